@@ -1,22 +1,50 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from pdfminer.high_level import extract_text as pdf_extract_text
+from flask import Flask, Request, g, has_app_context, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 from docx import Document as DocxDocument
 import os
-import requests
-import re
+import json
+import click
+import contextvars
+import cProfile
+import pstats
 import secrets # Import secrets for generating a secure key
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from jobs import JobQueue
+from cache import ExtractionCache, hash_stream
+from ocr_client import OCRSpaceClient
+from ocr_engines import OCRSpaceEngine, TesseractEngine, FallbackEngine
+from field_extractor import FieldExtractor
+from pdf_extractor import PDFTextExtractor
+from record_store import DEMO_RECORDS, RecordStore
+from metrics import Metrics
 
 # Ensure temp directory exists locally when app starts
-os.makedirs(os.path.join(os.path.dirname(__file__), 'temp'), exist_ok=True)
+TEMP_DIR = os.path.join(os.path.dirname(__file__), 'temp')
+os.makedirs(TEMP_DIR, exist_ok=True)
+
+# Uploads are kept in memory and only spill to a temp file above this size (bytes)
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', str(16 * 1024 * 1024)))
+
+
+class UploadRequest(Request):
+    """Request that buffers uploaded files in memory up to UPLOAD_SPOOL_THRESHOLD."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD, mode='rb+', dir=TEMP_DIR)
+
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 # Set a secure secret key for session management
 # In production, use a value from environment variables or a secret file
 app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(16)) # Use env var first, fallback to random for local test
 
 
 # OCR Space API Configuration (Remember to set your API key as environment variable in production!)
-OCR_SPACE_API_URL = "https://api.ocr.space/parse/image"
+OCR_SPACE_API_URL = os.environ.get('OCR_SPACE_API_URL', "https://api.ocr.space/parse/image")
 OCR_SPACE_API_KEY = os.environ.get('OCR_SPACE_API_KEY')
 if not OCR_SPACE_API_KEY or OCR_SPACE_API_KEY == "K87955728688957":
     # Replace with your actual key for local testing if not using env vars
@@ -26,6 +54,96 @@ if not OCR_SPACE_API_KEY or OCR_SPACE_API_KEY == "K87955728688957":
     if app.debug: # Only print detailed warning in debug mode
         print("Please set the OCR_SPACE_API_KEY environment variable.")
 
+# OCR Space client tuning: timeouts in seconds, retries on 5xx/429, client-side rate limit in requests/second (0 disables)
+OCR_CONNECT_TIMEOUT = float(os.environ.get('OCR_CONNECT_TIMEOUT', '5'))
+OCR_READ_TIMEOUT = float(os.environ.get('OCR_READ_TIMEOUT', '60'))
+OCR_MAX_RETRIES = int(os.environ.get('OCR_MAX_RETRIES', '3'))
+OCR_RATE_LIMIT = float(os.environ.get('OCR_RATE_LIMIT', '2'))
+OCR_RATE_BURST = float(os.environ.get('OCR_RATE_BURST', '5'))
+
+# One pooled keep-alive session shared by every thread in this process
+ocr_client = OCRSpaceClient(
+    OCR_SPACE_API_URL,
+    OCR_SPACE_API_KEY,
+    connect_timeout=OCR_CONNECT_TIMEOUT,
+    read_timeout=OCR_READ_TIMEOUT,
+    max_retries=OCR_MAX_RETRIES,
+    rate_limit=OCR_RATE_LIMIT,
+    rate_burst=OCR_RATE_BURST,
+)
+ocr_space_engine = OCRSpaceEngine(ocr_client, language='eng')
+
+# OCR Engine Selection
+# OCR_ENGINE: "ocrspace" (remote API), "tesseract" (local) or "auto" (local Tesseract when installed,
+# falling back to OCR Space on errors; OCR Space only otherwise)
+OCR_ENGINE = os.environ.get('OCR_ENGINE', 'ocrspace').lower()
+TESSERACT_LANGUAGE = os.environ.get('TESSERACT_LANGUAGE', 'eng')
+TESSERACT_WORKERS = int(os.environ['TESSERACT_WORKERS']) if os.environ.get('TESSERACT_WORKERS') else None # Default: one per core
+OCR_TARGET_DPI = int(os.environ.get('OCR_TARGET_DPI', '300')) # Higher-DPI scans are downscaled to this before recognition
+OCR_MAX_DIMENSION = int(os.environ.get('OCR_MAX_DIMENSION', '4000'))
+OCR_BINARIZE_THRESHOLD = int(os.environ['OCR_BINARIZE_THRESHOLD']) if os.environ.get('OCR_BINARIZE_THRESHOLD') else None # Default: Otsu
+
+
+# Upload Processing Configuration
+# Files in one upload are processed by up to UPLOAD_MAX_WORKERS threads; each file gets its own timeout (seconds, 0 disables)
+# The whole request must still finish within gunicorn's worker timeout (30s by default, as in the Procfile):
+# raise gunicorn's --timeout before raising UPLOAD_FILE_TIMEOUT, or for batches of more than UPLOAD_MAX_WORKERS slow files.
+UPLOAD_MAX_WORKERS = max(1, int(os.environ.get('UPLOAD_MAX_WORKERS', '4')))
+UPLOAD_FILE_TIMEOUT = float(os.environ.get('UPLOAD_FILE_TIMEOUT', '25'))
+
+# Background Job Configuration
+# Job state lives in SQLite so every gunicorn worker can report on (and pick up) any job
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH', os.path.join(TEMP_DIR, 'jobs.sqlite3'))
+JOB_MAX_WORKERS = max(1, int(os.environ.get('JOB_MAX_WORKERS', '2')))
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', '120')) # Requeue running files whose worker heartbeat stopped
+# /jobs/<id>/events closes each stream after this many seconds and the browser's EventSource reconnects,
+# so a stream never outlives the 30s timeout of gunicorn's default sync workers. Long-lived streams still
+# hold a worker while open: serve SSE with a threaded or async worker class (e.g. --threads 4 or -k gevent).
+JOB_EVENTS_STREAM_SECONDS = float(os.environ.get('JOB_EVENTS_STREAM_SECONDS', '20'))
+JOB_EVENTS_RETRY_MS = int(os.environ.get('JOB_EVENTS_RETRY_MS', '1000'))
+
+# Extraction Cache Configuration
+# Bump EXTRACTION_CACHE_VERSION whenever extraction or extract_structured_data output changes
+EXTRACTION_CACHE_VERSION = "1"
+EXTRACTION_CACHE_PATH = os.environ.get('EXTRACTION_CACHE_PATH', os.path.join(TEMP_DIR, 'extraction_cache.sqlite3'))
+EXTRACTION_CACHE_ENTRIES = int(os.environ.get('EXTRACTION_CACHE_ENTRIES', '256')) # In-process LRU tier, 0 disables
+EXTRACTION_CACHE_DISK_BYTES = int(os.environ.get('EXTRACTION_CACHE_DISK_BYTES', str(256 * 1024 * 1024))) # Shared SQLite tier, 0 disables
+
+# Structured Field Configuration
+# Optional JSON file with a list of {"name", "aliases", "pattern"} entries; defaults to the six PO fields
+FIELD_SCHEMA_FILE = os.environ.get('FIELD_SCHEMA_FILE')
+field_extractor = FieldExtractor.from_json_file(FIELD_SCHEMA_FILE) if FIELD_SCHEMA_FILE else FieldExtractor()
+
+# PDF Extraction Configuration
+# PDF_PROCESS_WORKERS > 0 parses PDFs in a process pool; PDF_MAX_PAGES caps pages parsed (0 = all)
+# PDF_EARLY_EXIT stops after the page where the last schema field was found
+# PDF_LAPARAMS is a JSON object of pdfminer LAParams arguments, e.g. {"boxes_flow": null} for faster layout
+PDF_PROCESS_WORKERS = int(os.environ.get('PDF_PROCESS_WORKERS', '0'))
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', '0'))
+PDF_EARLY_EXIT = os.environ.get('PDF_EARLY_EXIT', '1') == '1'
+PDF_LAPARAMS = os.environ.get('PDF_LAPARAMS', '{}')
+pdf_text_extractor = PDFTextExtractor(
+    process_workers=PDF_PROCESS_WORKERS,
+    maxpages=PDF_MAX_PAGES,
+    laparams_settings=json.loads(PDF_LAPARAMS),
+    field_extractor=field_extractor if PDF_EARLY_EXIT else None,
+)
+
+
+# Reference Record Store Configuration
+# SQLite database of reference records; load it with `flask --app app import-records <file.csv|file.jsonl>`
+RECORD_DB_PATH = os.environ.get('RECORD_DB_PATH', os.path.join(os.path.dirname(__file__), 'records.sqlite3'))
+# SEED_DEMO_RECORDS=1 loads record_store.DEMO_RECORDS into an empty store (local development and benchmarks only)
+SEED_DEMO_RECORDS = os.environ.get('SEED_DEMO_RECORDS', '0') == '1'
+
+
+# Instrumentation Configuration
+# Per-process metric snapshots are merged from METRICS_DIR by the /metrics endpoint
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(TEMP_DIR, 'metrics'))
+# When > 0, every request is profiled and the cProfile stats of those slower than this are dumped to PROFILE_DIR
+PROFILE_SLOW_REQUEST_MS = float(os.environ.get('PROFILE_SLOW_REQUEST_MS', '0'))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(TEMP_DIR, 'profiles'))
+
 
 # --- Dummy Users (Replace with a real database/auth system in production) ---
 DUMMY_USERS = {
@@ -44,50 +162,42 @@ def inject_utilities():
 # ----------------------------------
 
 # --- OCR and Data Extraction Functions (Keep as is) ---
-def ocr_image_via_api(image_path):
-    """Performs OCR on an image using OCR Space API."""
+def ocr_image_via_api(image_source, filename='image.png'):
+    """Performs OCR on an image (a path or a binary file object) using OCR Space API."""
     if OCR_SPACE_API_KEY == "YOUR_OCR_SPACE_API_KEY_HERE":
          return "Error: OCR Space API Key not configured."
-    try:
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
-
-        payload = {
-            'apikey': OCR_SPACE_API_KEY,
-            'language': 'eng'
-        }
-        files = {'image': ('image.png', image_data)}
+    return ocr_image(image_source, filename, engine=ocr_space_engine)
 
-        response = requests.post(OCR_SPACE_API_URL, files=files, data=payload)
-        response.raise_for_status()
-        result = response.json()
 
-        if result and not result.get('IsErroredOnProcessing'):
-            text = result.get('ParsedResults')[0].get('ParsedText') if result.get('ParsedResults') else "No text found in image."
-            return text.strip()
-        else:
-            error_message = result.get('ErrorMessage') or "Unknown error from OCR Space API."
-            return f"OCR Space API Error: {error_message}"
-
-    except requests.exceptions.RequestException as e:
-        return f"Error connecting to OCR Space API: {e}"
+def ocr_image(image_source, filename='image.png', engine=None):
+    """Performs OCR on an image (a path or a binary file object) with the configured OCR engine."""
+    engine = engine or ocr_engine
+    try:
+        if isinstance(image_source, (str, os.PathLike)):
+            with open(image_source, 'rb') as f:
+                return engine.recognize(f, os.path.basename(image_source))
+        return engine.recognize(image_source, filename)
     except Exception as e:
         return f"Error during OCR processing: {e}"
 
 
-def extract_text_from_pdf(file_path):
-    """Extracts text directly from a PDF file using pdfminer.six."""
+def extract_text_from_pdf(file_source):
+    """Extracts text directly from a PDF (a path or a binary file object) using pdfminer.six."""
     try:
-        text = pdf_extract_text(file_path)
+        if isinstance(file_source, (str, os.PathLike)):
+            with open(file_source, 'rb') as f:
+                text = pdf_text_extractor.extract(f)
+        else:
+            text = pdf_text_extractor.extract(file_source)
         return text.strip()
     except Exception as e:
         return f"Error extracting text from PDF: {e}"
 
 
-def extract_text_from_docx(file_path):
-    """Extracts text from a DOCX file using python-docx."""
+def extract_text_from_docx(file_source):
+    """Extracts text from a DOCX file (a path or a binary file object) using python-docx."""
     try:
-        doc = DocxDocument(file_path)
+        doc = DocxDocument(file_source)
         full_text = []
         for paragraph in doc.paragraphs:
             full_text.append(paragraph.text)
@@ -96,60 +206,111 @@ def extract_text_from_docx(file_path):
         return f"Error extracting text from DOCX: {e}"
 
 
-def extract_text_from_file(file_path, filename):
-    """Detects file type and calls appropriate extraction method."""
+def extract_text_from_file(file_source, filename):
+    """Detects file type and calls appropriate extraction method.
+
+    file_source is a path or a seekable binary file object positioned at the start.
+    """
     file_extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
 
     if file_extension in ['png', 'jpg', 'jpeg', 'bmp', 'gif', 'tiff']: # Image types
-        return ocr_image_via_api(file_path)
+        return ocr_image(file_source, filename)
     elif file_extension == 'pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(file_source)
     elif file_extension == 'docx':
-        return extract_text_from_docx(file_path)
+        return extract_text_from_docx(file_source)
     else:
         return "Unsupported file format."
 
+
+# Prefixes of the messages the extractors return instead of raising
+EXTRACTION_ERROR_PREFIXES = ("Error", "OCR Space API Error", "Unsupported file format.")
+
+
+def is_extraction_error(text):
+    """Returns True if text is an error message from an extractor rather than document text."""
+    return not text or text.startswith(EXTRACTION_ERROR_PREFIXES)
+
+
+def file_type_of(filename):
+    """Returns the lower-cased file extension used to label metrics."""
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'none'
+
+
+def extraction_engine(filename):
+    """Names the extractor used for a file, so cached results are tied to the engine that produced them."""
+    file_extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if file_extension in ['png', 'jpg', 'jpeg', 'bmp', 'gif', 'tiff']:
+        return ocr_engine.name
+    elif file_extension == 'pdf':
+        return f"pdfminer[{pdf_text_extractor.settings_tag}]"
+    elif file_extension == 'docx':
+        return "python-docx"
+    return None
+
+
+def extract_text_and_data(fileobj, filename):
+    """Returns (extracted_text, structured_data) for a seekable binary file object,
+    served from the extraction cache when possible.
+
+    structured_data is None when the text is an extraction error.
+    """
+    engine = extraction_engine(filename)
+    if engine is None:
+        return extract_text_from_file(fileobj, filename), None
+
+    file_type = file_type_of(filename)
+    size = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(0)
+
+    with metrics.stage('hash', file_type, size):
+        key = ExtractionCache.make_key(hash_stream(fileobj), engine, f"{EXTRACTION_CACHE_VERSION}-{field_extractor.fingerprint}")
+    with metrics.stage('cache', file_type):
+        cached = extraction_cache.get(key)
+    if cached is not None:
+        return cached
+
+    fileobj.seek(0)
+    with metrics.stage('extract', file_type, size):
+        extracted_text = extract_text_from_file(fileobj, filename)
+    if is_extraction_error(extracted_text):
+        if file_type in ['png', 'jpg', 'jpeg', 'bmp', 'gif', 'tiff']:
+            metrics.inc('ocr_errors_total', {'engine': engine})
+        return extracted_text, None # Never cache errors: the next upload should retry
+
+    with metrics.stage('structure', file_type, len(extracted_text)):
+        structured_data = extract_structured_data(extracted_text)
+    extraction_cache.put(key, extracted_text, structured_data)
+    return extracted_text, structured_data
+
+
 # --- Data Extraction and Comparison Functions (Keep as is) ---
 
 def extract_structured_data(text):
-    """Extracts specific structured data fields from text using regex."""
-    data = {}
-    # Define the fields we want to extract
-    field_names = ["Sr no.", "Name", "City", "Age", "Country", "Address"]
-    # Initialize all expected fields with None
-    for field in field_names:
-        data[field] = None
-
-    lines = text.strip().split('\n')
-
-    for field in field_names:
-        pattern = re.compile(r"^\s*" + re.escape(field) + r"\s*:\s*(.*)", re.IGNORECASE)
-        for line in lines:
-            match = pattern.match(line.strip())
-            if match:
-                value = match.group(1).strip()
-                data[field] = value
-                break # Found this field, move to the next field_name
-    return data
-
-# Dummy database (Keep as is)
-dummy_database = {
-    "S001": { "Sr no.": "S001", "Name": "Hemanshu Kasar", "City": "Nagpur", "Age": "23", "Country": "India", "Address": "7, gurudeo nagar" },
-    "S002": { "Sr no.": "S002", "Name": "John Doe", "City": "New York", "Age": "30", "Country": "USA", "Address": "123 Main St" },
-    "S003": { "Sr no.": "S003", "Name": "Sarah Johnson", "City": "London", "Age": "27", "Country": "UK", "Address": "45 Oxford Street" },
-    "S004": { "Sr no.": "S004", "Name": "Raj Patel", "City": "Mumbai", "Age": "32", "Country": "India", "Address": "201, Sea View Apartments" },
-    "S005": { "Sr no.": "S005", "Name": "Maria Garcia", "City": "Barcelona", "Age": "29", "Country": "Spain", "Address": "Carrer de Mallorca, 15" },
-    "S006": { "Sr no.": "S006", "Name": "Akira Tanaka", "City": "Tokyo", "Age": "35", "Country": "Japan", "Address": "2-1-3 Shibuya" },
-    "S007": { "Sr no.": "S007", "Name": "Chen Wei", "City": "Shanghai", "Age": "26", "Country": "China", "Address": "88 Nanjing Road" },
-    "S008": { "Sr no.": "S008", "Name": "Lucas Silva", "City": "São Paulo", "Age": "31", "Country": "Brazil", "Address": "Rua Augusta, 1200" },
-    "S009": { "Sr no.": "S009", "Name": "Olivia Miller", "City": "Sydney", "Age": "28", "Country": "Australia", "Address": "42 Bondi Beach Road" },
-    "S010": { "Sr no.": "S010", "Name": "Ahmed Hassan", "City": "Cairo", "Age": "33", "Country": "Egypt", "Address": "17 Al Tahrir Square" }
-}
+    """Extracts specific structured data fields from text using the compiled field schema."""
+    return field_extractor.extract(text)
+
+
+def get_database_records(sr_nos):
+    """Fetches the records for several Sr nos. with one query; returns {sr_no: record or None}.
+
+    Inside a request, records are memoized on flask.g, so the template's
+    get_database_data calls never hit the database a second time.
+    """
+    sr_nos = [sr_no for sr_no in sr_nos if sr_no]
+    memo = g.setdefault('database_records', {}) if has_app_context() else {}
+    missing = [sr_no for sr_no in sr_nos if sr_no not in memo]
+    if missing:
+        with metrics.stage('records', 'all'):
+            found = record_store.get_many(missing)
+        for sr_no in missing:
+            memo[sr_no] = found.get(sr_no)
+    return {sr_no: memo[sr_no] for sr_no in sr_nos}
 
 
 def get_database_data(sr_no):
-    """Fetches data from the dummy database based on Sr no."""
-    return dummy_database.get(sr_no, None)
+    """Fetches data from the record store based on Sr no."""
+    return get_database_records([sr_no]).get(sr_no)
 
 def compare_data(extracted_data, db_data):
     """Compares extracted data with database data and calculates accuracy."""
@@ -172,6 +333,242 @@ def compare_data(extracted_data, db_data):
     return accuracy, mismatched_fields, None
 
 
+# --- Upload Processing Functions ---
+def extract_file_stream(fileobj, filename):
+    """Extracts text and structured data from a seekable binary file object.
+
+    The comparison fields are left empty; compare_results fills them in.
+    """
+    file_type = file_type_of(filename)
+    try:
+        extracted_text, extracted_data = extract_text_and_data(fileobj, filename)
+        metrics.inc('files_processed_total', {'file_type': file_type, 'outcome': 'extraction_error' if extracted_data is None else 'ok'})
+        metrics.inc('bytes_processed_total', {'file_type': file_type}, fileobj.seek(0, os.SEEK_END))
+        return {
+            "extracted_text": extracted_text,
+            "structured_data": extracted_data if extracted_data is not None else {},
+            "accuracy": None,
+            "mismatched_fields": {},
+            "comparison_error": None
+        }
+
+    except Exception as e:
+         metrics.inc('files_processed_total', {'file_type': file_type, 'outcome': 'failed'})
+         return {"error": f"Processing failed for {filename}: {e}"}
+
+
+def compare_results(results):
+    """Compares every extracted result in results with its database record, fetching all records in one query."""
+    comparable = [result for result in results.values() if 'error' not in result and result["structured_data"]]
+    db_records = get_database_records(result["structured_data"].get("Sr no.") for result in comparable)
+
+    with metrics.stage('compare', 'all'):
+        for result in comparable:
+            sr_no_value = result["structured_data"].get("Sr no.")
+            if sr_no_value:
+                result["accuracy"], result["mismatched_fields"], result["comparison_error"] = \
+                    compare_data(result["structured_data"], db_records.get(sr_no_value))
+            else:
+                result["comparison_error"] = "Sr no. not found in extracted data, cannot compare."
+    return results
+
+
+def process_file_stream(fileobj, filename):
+    """Extracts text from a seekable binary file object and compares its structured data with the database."""
+    return compare_results({filename: extract_file_stream(fileobj, filename)})[filename]
+
+
+def process_file_path(file_path, filename):
+    """Processes a file stored on disk (used by the background job queue)."""
+    try:
+        with open(file_path, 'rb') as f:
+            return process_file_stream(f, filename)
+    except OSError as e:
+         return {"error": f"Processing failed for {filename}: {e}"}
+
+
+def process_uploaded_file(image_file, filename):
+    """Extracts an upload straight from its request stream, without copying it to disk.
+
+    UploadRequest keeps the stream in memory unless it is larger than UPLOAD_SPOOL_THRESHOLD.
+    """
+    image_file.stream.seek(0)
+    return extract_file_stream(image_file.stream, filename)
+
+
+def process_uploaded_files(image_files, max_workers=None, file_timeout=None):
+    """Processes uploaded files concurrently and returns their results in upload order.
+
+    A file that fails or exceeds its timeout only gets its own error entry; the rest
+    of the batch is unaffected. At most max_workers files run at once, but a file that
+    times out gives up its slot straight away: its thread cannot be interrupted, so it
+    is abandoned (its late result discarded) and the next queued file starts on a new one.
+    """
+    max_workers = max_workers or UPLOAD_MAX_WORKERS
+    file_timeout = UPLOAD_FILE_TIMEOUT if file_timeout is None else file_timeout
+
+    entries = [] # (result key, upload index or ready result), in upload order
+    waiting = deque() # (upload index, file storage, filename) not started yet
+    for index, image_file in enumerate(image_files):
+        filename = image_file.filename
+        if filename == '':
+            entries.append((f"Skipped empty file input ({index + 1})", {"error": "Skipped empty file input."}))
+            continue
+        entries.append((filename, index))
+        waiting.append((index, image_file, filename))
+
+    finished = queue.SimpleQueue() # (upload index, result) from the worker threads
+    # Each file runs in a copy of the request's context so stage timings reach its Server-Timing header
+    context = contextvars.copy_context()
+    # When the request is being profiled, each file gets its own profiler, merged into the dump after the request
+    profiles = g.setdefault('upload_profiles', []) if has_app_context() and 'profiler' in g else None
+
+    def run(index, image_file, filename):
+        profiler = cProfile.Profile() if profiles is not None else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = context.copy().run(process_uploaded_file, image_file, filename)
+        except Exception as e:
+            result = {"error": f"Processing failed for {filename}: {e}"}
+        if profiler is not None:
+            profiler.disable()
+            profiles.append(profiler)
+        finished.put((index, result))
+
+    outcomes = {}
+    running = {} # upload index -> (filename, time.monotonic() when it started)
+    while waiting or running:
+        while waiting and len(running) < max_workers:
+            index, image_file, filename = waiting.popleft()
+            running[index] = (filename, time.monotonic())
+            threading.Thread(target=run, args=(index, image_file, filename), name=f'upload-{index}', daemon=True).start()
+
+        timeout = None
+        if file_timeout:
+            timeout = max(0.0, min(started for _, started in running.values()) + file_timeout - time.monotonic())
+        try:
+            index, result = finished.get(timeout=timeout)
+            if running.pop(index, None) is not None: # Otherwise it already timed out
+                outcomes[index] = result
+        except queue.Empty:
+            pass
+
+        if file_timeout:
+            now = time.monotonic()
+            for index, (filename, started) in list(running.items()):
+                if now - started >= file_timeout:
+                    del running[index]
+                    outcomes[index] = {"error": f"Processing timed out for {filename} after {file_timeout:g} seconds."}
+
+    results = {}
+    for key, entry in entries:
+        results[key] = entry if isinstance(entry, dict) else outcomes[entry]
+    # One batched record lookup for the whole upload, done here rather than in the workers
+    return compare_results(results)
+
+
+metrics = Metrics(METRICS_DIR)
+
+
+def build_ocr_engine(choice):
+    """Returns the OCR engine selected by OCR_ENGINE."""
+    if choice not in ('ocrspace', 'tesseract', 'auto'):
+        raise ValueError(f"Unknown OCR_ENGINE {choice!r}; expected 'ocrspace', 'tesseract' or 'auto'.")
+    if choice == 'ocrspace' or (choice == 'auto' and not TesseractEngine.available()):
+        return ocr_space_engine
+
+    tesseract_engine = TesseractEngine(
+        language=TESSERACT_LANGUAGE,
+        process_workers=TESSERACT_WORKERS,
+        target_dpi=OCR_TARGET_DPI,
+        max_dimension=OCR_MAX_DIMENSION,
+        threshold=OCR_BINARIZE_THRESHOLD,
+    )
+    if choice == 'auto':
+        return FallbackEngine(tesseract_engine, ocr_space_engine, is_extraction_error)
+    return tesseract_engine
+
+
+ocr_engine = build_ocr_engine(OCR_ENGINE)
+
+record_store = RecordStore(RECORD_DB_PATH)
+if SEED_DEMO_RECORDS and record_store.count() == 0:
+    record_store.upsert_many(DEMO_RECORDS.values())
+if record_store.count() == 0:
+    # Without reference records every upload reports "Sr no. not found in database."
+    print(f"Warning: the record store at {RECORD_DB_PATH} is empty. Load reference data with "
+          f"`flask --app app import-records <file.csv|file.jsonl>`, or set SEED_DEMO_RECORDS=1 for the demo records.")
+
+
+@app.cli.command('import-records')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_records_command(path):
+    """Bulk-loads reference records from a CSV or JSONL file into the record store."""
+    written = record_store.import_file(path)
+    click.echo(f"Imported {written} records into {RECORD_DB_PATH} ({record_store.count()} total).")
+
+
+extraction_cache = ExtractionCache(
+    EXTRACTION_CACHE_PATH,
+    max_entries=EXTRACTION_CACHE_ENTRIES,
+    max_disk_bytes=EXTRACTION_CACHE_DISK_BYTES,
+    metrics=metrics,
+)
+
+# Shared job queue; its dispatcher thread starts lazily in whichever process first needs it
+job_queue = JobQueue(
+    JOB_DB_PATH,
+    os.path.join(TEMP_DIR, 'jobs'),
+    process_file_path,
+    max_workers=JOB_MAX_WORKERS,
+    stale_after=JOB_STALE_SECONDS,
+)
+
+
+# --- Request Instrumentation ---
+@app.before_request
+def start_request_metrics():
+    """Starts the per-request stage timings and, if enabled, the profiler."""
+    metrics.start_request()
+    if PROFILE_SLOW_REQUEST_MS > 0:
+        g.profiler = cProfile.Profile() # The request thread; process_uploaded_files profiles its upload threads
+        g.profiler.enable()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Records request counters and latency, adds the Server-Timing header and dumps slow profiles."""
+    timings = metrics.current_request()
+    if timings is None:
+        return response
+    elapsed = time.perf_counter() - timings.started
+    endpoint = request.endpoint or 'unknown'
+
+    metrics.inc('requests_total', {'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)})
+    metrics.observe('request_seconds', elapsed, {'endpoint': endpoint})
+    response.headers['Server-Timing'] = timings.server_timing()
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        if elapsed * 1000 > PROFILE_SLOW_REQUEST_MS:
+            stats = pstats.Stats(profiler)
+            for upload_profile in g.pop('upload_profiles', []): # Files that timed out are not included
+                stats.add(upload_profile)
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            stats.dump_stats(os.path.join(
+                PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{endpoint}_{elapsed * 1000:.0f}ms.prof"))
+
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Exposes the metrics of every worker process in Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 # --- Route for Landing Page ---
 @app.route('/', methods=['GET'])
 def landing_page():
@@ -233,51 +630,7 @@ def app_dashboard():
              if not image_files or all(f.filename == '' for f in image_files):
                   results["Overall Error"] = {"error": "No files selected."}
              else:
-                for image_file in image_files:
-                    filename = image_file.filename
-                    if filename == '':
-                         results[f"Skipped empty file input ({len(results) + 1})"] = {"error": "Skipped empty file input."}
-                         continue
-
-                    if image_file:
-                        temp_dir = os.path.join(app.root_path, 'temp')
-                        temp_filename = f"{os.getpid()}_{os.urandom(4).hex()}_{filename}"
-                        temp_file_path = os.path.join(temp_dir, temp_filename)
-
-                        try:
-                            image_file.save(temp_file_path)
-                            extracted_text = extract_text_from_file(temp_file_path, filename)
-
-                            structured_data = {}
-                            accuracy = None
-                            mismatched_fields = {}
-                            comparison_error = None
-
-                            if extracted_text and not extracted_text.startswith("Error"):
-                                file_extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
-                                if file_extension in ['docx', 'pdf', 'png', 'jpg', 'jpeg', 'bmp', 'gif', 'tiff']:
-                                     structured_data = extract_structured_data(extracted_text)
-                                     sr_no_value = structured_data.get("Sr no.")
-                                     if sr_no_value:
-                                         db_data = get_database_data(sr_no_value)
-                                         accuracy, mismatched_fields, comparison_error = compare_data(structured_data, db_data)
-                                     else:
-                                         comparison_error = "Sr no. not found in extracted data, cannot compare."
-
-                            results[filename] = {
-                                "extracted_text": extracted_text,
-                                "structured_data": structured_data,
-                                "accuracy": accuracy,
-                                "mismatched_fields": mismatched_fields,
-                                "comparison_error": comparison_error
-                            }
-
-                        except Exception as e:
-                             results[filename] = {"error": f"Processing failed for {filename}: {e}"}
-
-                        finally:
-                             if os.path.exists(temp_file_path):
-                                 os.remove(temp_file_path)
+                results.update(process_uploaded_files(image_files))
 
         # After a POST request (file upload), ensure we are back on the PO Verification tab
         active_tab = 'po-verification'
@@ -285,7 +638,75 @@ def app_dashboard():
 
     # For GET requests or after POST processing, render the dashboard template
     # Pass results and active_tab to the template
-    return render_template('app_dashboard.html', results=results, active_tab=active_tab)
+    with metrics.stage('render', 'html'):
+        return render_template('app_dashboard.html', results=results, active_tab=active_tab)
+
+
+# --- Routes for Background Jobs (Require Login) ---
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queues uploaded files for background verification and returns the job id immediately."""
+    if 'logged_in' not in session or not session['logged_in']:
+        return jsonify({"error": "Login required."}), 401
+
+    image_files = request.files.getlist('image')
+    if not image_files or all(f.filename == '' for f in image_files):
+        return jsonify({"error": "No files selected."}), 400
+
+    job_id = job_queue.submit(image_files)
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for('job_status', job_id=job_id),
+        "events_url": url_for('job_events', job_id=job_id),
+    }), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Returns per-file progress and results for a job."""
+    if 'logged_in' not in session or not session['logged_in']:
+        return jsonify({"error": "Login required."}), 401
+
+    job_queue.start() # Make sure this worker also helps drain the queue
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Streams job progress as server-sent events until every file has finished.
+
+    Each response lasts at most JOB_EVENTS_STREAM_SECONDS; the retry field tells
+    EventSource how soon to reconnect, and the next stream resumes with the
+    current progress.
+    """
+    if 'logged_in' not in session or not session['logged_in']:
+        return jsonify({"error": "Login required."}), 401
+
+    job_queue.start()
+    if job_queue.status(job_id) is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    def stream():
+        deadline = time.monotonic() + JOB_EVENTS_STREAM_SECONDS
+        last_counts = None
+        yield f"retry: {JOB_EVENTS_RETRY_MS}\n\n"
+        while True:
+            status = job_queue.status(job_id)
+            if status['counts'] != last_counts:
+                last_counts = status['counts']
+                yield f"event: progress\ndata: {json.dumps(status)}\n\n"
+            if status['status'] == 'finished':
+                yield f"event: finished\ndata: {json.dumps({'job_id': job_id})}\n\n"
+                return
+            if time.monotonic() >= deadline:
+                return # EventSource reconnects after the retry delay
+            time.sleep(1)
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 # --- Route for Logout ---
@@ -0,0 +1,81 @@
+"""Micro-benchmark: schema-driven FieldExtractor vs. the original extract_structured_data.
+
+Run from the repository root:
+
+    python benchmarks/bench_field_extractor.py --lines 1000 10000 100000
+
+Each synthetic document is mostly filler text with the PO fields either near
+the top (the usual layout) or at the very end (worst case for early exit).
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from field_extractor import FieldExtractor  # noqa: E402
+
+
+FIELDS = {
+    "Sr no.": "S004", "Name": "Raj Patel", "City": "Mumbai",
+    "Age": "32", "Country": "India", "Address": "201, Sea View Apartments",
+}
+FILLER_WORDS = "purchase order item quantity unit price total tax invoice delivery terms net payable".split()
+
+
+def legacy_extract_structured_data(text):
+    """The original per-field implementation, kept verbatim for comparison."""
+    data = {}
+    field_names = ["Sr no.", "Name", "City", "Age", "Country", "Address"]
+    for field in field_names:
+        data[field] = None
+
+    lines = text.strip().split('\n')
+
+    for field in field_names:
+        pattern = re.compile(r"^\s*" + re.escape(field) + r"\s*:\s*(.*)", re.IGNORECASE)
+        for line in lines:
+            match = pattern.match(line.strip())
+            if match:
+                value = match.group(1).strip()
+                data[field] = value
+                break
+    return data
+
+
+def make_document(line_count, fields_at_end=False, seed=0):
+    """Builds a synthetic document of roughly line_count lines."""
+    rng = random.Random(seed)
+    filler = [" ".join(rng.choices(FILLER_WORDS, k=8)) for _ in range(line_count)]
+    field_lines = [f"{name}: {value}" for name, value in FIELDS.items()]
+    lines = filler + field_lines if fields_at_end else field_lines + filler
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    extractor = FieldExtractor()
+    print(f"{'lines':>8} {'layout':>8} {'legacy ms':>10} {'schema ms':>10} {'speed-up':>9}")
+    for line_count in args.lines:
+        for fields_at_end in (False, True):
+            text = make_document(line_count, fields_at_end)
+            expected = legacy_extract_structured_data(text)
+            if extractor.extract(text) != expected:
+                raise SystemExit(f"Result mismatch for {line_count} lines (fields_at_end={fields_at_end})")
+
+            number = max(1, 20000 // line_count)
+            legacy = min(timeit.repeat(lambda: legacy_extract_structured_data(text), number=number, repeat=args.repeat)) / number
+            schema = min(timeit.repeat(lambda: extractor.extract(text), number=number, repeat=args.repeat)) / number
+            layout = 'end' if fields_at_end else 'top'
+            print(f"{line_count:>8} {layout:>8} {legacy * 1000:>10.3f} {schema * 1000:>10.3f} {legacy / schema:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
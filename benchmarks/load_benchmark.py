@@ -0,0 +1,382 @@
+"""Load and throughput benchmark for the /app upload pipeline.
+
+Generates synthetic PO documents, starts the local OCR Space stand-in, then
+posts batches of one file type at a time to /app at several concurrency
+levels, either through the Flask test client (in-process) or through a real
+gunicorn server. For every (mode, concurrency, file type) it reports
+p50/p95/p99 request latency, files/sec and peak RSS, and saves them as a JSON
+baseline that later runs can be compared against:
+
+    python benchmarks/load_benchmark.py --output baseline.json
+    python benchmarks/load_benchmark.py --modes testclient gunicorn --concurrency 1 4 8 --compare baseline.json
+
+The extraction cache is disabled unless --with-cache is given, so every
+request measures the full pipeline. Peak RSS is read from /proc and is only
+reported on Linux.
+
+/app answers 200 even when files fail, so every rendered result is checked:
+a file counts as verified only if it matched its record. files/sec counts
+verified files only, and a run with failed files is not saved as a baseline
+unless failures were asked for with --ocr-error-rate.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic_docs  # noqa: E402
+from ocr_stub_server import start_server  # noqa: E402
+
+
+LOGIN = {'username': 'admin', 'password': 'admin@a123'} # One of app.DUMMY_USERS
+# Metrics compared against a baseline; True means higher is better
+COMPARED_METRICS = {'p50_ms': False, 'p95_ms': False, 'p99_ms': False, 'files_per_sec': True}
+# Synthetic documents copy their record exactly, so anything short of a "Good" match is a failure
+VERIFIED_MARKER = 'class="accuracy-good"'
+
+
+def count_failed_files(html):
+    """Counts the result blocks of the PO Verification tab that do not show a good match."""
+    start = html.find('id="po-verification"')
+    end = html.find('id="ats-verification"', start)
+    if start < 0:
+        return None # Not the dashboard at all
+    blocks = html[start:end if end > 0 else None].split('class="result-container"')[1:]
+    return sum(VERIFIED_MARKER not in block for block in blocks)
+
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+# --- Memory sampling ---
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _process_tree(root_pid):
+    """Returns root_pid and all of its descendants (Linux /proc only)."""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    tree, frontier = {root_pid}, [root_pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [pid for pid, ppid in parents.items() if ppid == parent and pid not in tree]
+        tree.update(children)
+        frontier.extend(children)
+    return tree
+
+
+class RSSSampler:
+    """Samples the summed RSS of a process tree on a background thread and keeps the peak."""
+
+    def __init__(self, root_pid, interval=0.05):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, sum(_rss_bytes(pid) for pid in _process_tree(self.root_pid)))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if os.path.isdir('/proc'):
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @property
+    def peak_mb(self):
+        return round(self.peak / (1024 * 1024), 1) if self.peak else None
+
+
+# --- Clients ---
+class TestClientPoster:
+    """Posts batches through Flask's test client, one client per thread."""
+
+    def __init__(self):
+        import app as app_module # Imported here so the benchmark environment is already in place
+
+        self.app = app_module.app
+        self.pid = os.getpid()
+        self._local = threading.local()
+
+    def close(self):
+        pass
+
+    def post(self, batch):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+            with client.session_transaction() as session:
+                session['logged_in'] = True
+        data = {'image': [(io.BytesIO(content), filename) for filename, content in batch]}
+        response = client.post('/app', data=data, content_type='multipart/form-data')
+        return response.status_code, count_failed_files(response.get_data(as_text=True))
+
+
+class GunicornPoster:
+    """Starts a gunicorn server for the app and posts batches to it over HTTP."""
+
+    def __init__(self, workers, threads, env):
+        import requests
+
+        self.requests = requests
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'app:app', '-b', f'127.0.0.1:{port}',
+             '-w', str(workers), '--threads', str(threads), '--timeout', '300', '--graceful-timeout', '5',
+             '--log-level', 'warning'],
+            cwd=REPO_ROOT, env=env,
+        )
+        self.pid = self.process.pid
+        self._local = threading.local()
+        self._sessions = []
+
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                requests.get(f"{self.base_url}/login", timeout=1)
+                break
+            except requests.exceptions.ConnectionError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn did not start; is it installed?")
+                time.sleep(0.2)
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def post(self, batch):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.requests.Session()
+            self._sessions.append(session)
+            session.post(f"{self.base_url}/login", data=LOGIN, timeout=30)
+        files = [('image', (filename, content)) for filename, content in batch]
+        response = session.post(f"{self.base_url}/app", files=files, timeout=600)
+        return response.status_code, count_failed_files(response.text)
+
+
+# --- Driver ---
+def run_level(poster, batches, concurrency):
+    """Posts every batch using `concurrency` client threads.
+
+    Returns (latencies, failed requests, failed files, wall seconds); every file of a
+    failed request counts as failed.
+    """
+    latencies, errors, failed_files = [], 0, 0
+    lock = threading.Lock()
+    queue = list(batches)
+
+    def worker():
+        nonlocal errors, failed_files
+        while True:
+            with lock:
+                if not queue:
+                    return
+                batch = queue.pop()
+            started = time.perf_counter()
+            status, failed = poster.post(batch)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status != 200 or failed is None:
+                    errors += 1
+                    failed_files += len(batch)
+                else:
+                    failed_files += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, failed_files, time.perf_counter() - started
+
+
+def benchmark(args, env):
+    corpus = {
+        file_type: [synthetic_docs.generate(file_type, index, args.pages, args.lines_per_page, args.seed)
+                    for index in range(args.batch_size * args.requests)]
+        for file_type in args.types
+    }
+
+    results = []
+    for mode in args.modes:
+        poster = TestClientPoster() if mode == 'testclient' else \
+            GunicornPoster(args.gunicorn_workers, args.gunicorn_threads, env)
+        try:
+            for concurrency in args.concurrency:
+                for file_type in args.types:
+                    documents = corpus[file_type]
+                    batches = [documents[start:start + args.batch_size]
+                               for start in range(0, len(documents), args.batch_size)]
+                    poster.post(batches[0]) # Warm-up: imports, pools and connections
+                    with RSSSampler(poster.pid) as sampler:
+                        latencies, errors, failed_files, wall = run_level(poster, batches, concurrency)
+                    row = {
+                        'mode': mode,
+                        'concurrency': concurrency,
+                        'file_type': file_type,
+                        'requests': len(latencies),
+                        'files': len(documents),
+                        'errors': errors,
+                        'failed_files': failed_files,
+                        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+                        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+                        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+                        'files_per_sec': round((len(documents) - failed_files) / wall, 2), # Verified files only
+                        'peak_rss_mb': sampler.peak_mb,
+                    }
+                    results.append(row)
+                    print(f"{mode:>10} c={concurrency:<3} {file_type:>5}  p50 {row['p50_ms']:>8.1f}ms  "
+                          f"p95 {row['p95_ms']:>8.1f}ms  p99 {row['p99_ms']:>8.1f}ms  "
+                          f"{row['files_per_sec']:>7.2f} files/s  rss {row['peak_rss_mb']} MB  "
+                          f"errors {errors}  failed files {failed_files}")
+        finally:
+            poster.close()
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints the change against a saved baseline; returns the number of regressions beyond tolerance."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(row['mode'], row['concurrency'], row['file_type']): row for row in json.load(f)['results']}
+
+    regressions = 0
+    print(f"\nComparison with {baseline_path} (tolerance {tolerance:.0%}):")
+    for row in results:
+        old = baseline.get((row['mode'], row['concurrency'], row['file_type']))
+        if old is None:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if not old.get(metric):
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            regressions += regressed
+            changes.append(f"{metric} {change:+.1%}{' REGRESSION' if regressed else ''}")
+        print(f"{row['mode']:>10} c={row['concurrency']:<3} {row['file_type']:>5}  " + ', '.join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /app latency and throughput.")
+    parser.add_argument('--modes', nargs='+', choices=['testclient', 'gunicorn'], default=['testclient'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--types', nargs='+', choices=synthetic_docs.FILE_TYPES, default=list(synthetic_docs.FILE_TYPES))
+    parser.add_argument('--batch-size', type=int, default=5, help="Files per POST")
+    parser.add_argument('--requests', type=int, default=8, help="POSTs per (concurrency, file type)")
+    parser.add_argument('--pages', type=int, default=2)
+    parser.add_argument('--lines-per-page', type=int, default=40)
+    parser.add_argument('--ocr-latency', type=float, default=0.3, help="Seconds the OCR stand-in takes per image")
+    parser.add_argument('--ocr-jitter', type=float, default=0.05)
+    parser.add_argument('--ocr-error-rate', type=float, default=0.0,
+                        help="Fraction of OCR calls the stand-in fails, to measure the error path")
+    parser.add_argument('--gunicorn-workers', type=int, default=2)
+    parser.add_argument('--gunicorn-threads', type=int, default=4)
+    parser.add_argument('--with-cache', action='store_true', help="Keep the extraction cache enabled")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write results as a JSON baseline")
+    parser.add_argument('--compare', help="Baseline JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative change before flagging")
+    args = parser.parse_args()
+
+    server, ocr_url = start_server(latency=args.ocr_latency, jitter=args.ocr_jitter, error_rate=args.ocr_error_rate,
+                                   seed=args.seed)
+    workdir = tempfile.mkdtemp(prefix='ocr-bench-')
+    # Must be in place before app is imported (here or in gunicorn): app reads its configuration on import
+    os.environ.update({
+        'OCR_SPACE_API_URL': ocr_url,
+        'OCR_SPACE_API_KEY': 'benchmark',
+        'OCR_ENGINE': 'ocrspace',
+        'OCR_RATE_LIMIT': '0',
+        'JOB_DB_PATH': os.path.join(workdir, 'jobs.sqlite3'),
+        'RECORD_DB_PATH': os.path.join(workdir, 'records.sqlite3'),
+        'SEED_DEMO_RECORDS': '1', # The synthetic documents are built from the demo records
+        'EXTRACTION_CACHE_PATH': os.path.join(workdir, 'extraction_cache.sqlite3'),
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+    })
+    if not args.with_cache:
+        os.environ.update({'EXTRACTION_CACHE_ENTRIES': '0', 'EXTRACTION_CACHE_DISK_BYTES': '0'})
+
+    try:
+        results = benchmark(args, dict(os.environ))
+    finally:
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'max_rss_mb_driver': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    failed_files = sum(row['failed_files'] for row in results)
+    if failed_files and not args.ocr_error_rate:
+        print(f"\n{failed_files} files failed although no failures were simulated; check the setup.", file=sys.stderr)
+        if args.output:
+            print(f"Not saving {args.output} as a baseline.", file=sys.stderr)
+        sys.exit(2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.output}")
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.tolerance) else 0)
+
+
+if __name__ == '__main__':
+    main()
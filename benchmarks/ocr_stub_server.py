@@ -0,0 +1,136 @@
+"""Local stand-in for the OCR Space parse endpoint.
+
+Accepts the same multipart POST as https://api.ocr.space/parse/image and
+answers with the ParsedResults / IsErroredOnProcessing response shape after
+a configurable delay. The "recognised" text is the po_text chunk that
+synthetic_docs.py embeds in its PNGs, so no real OCR is needed.
+
+Failures can be simulated at two levels: --error-rate answers HTTP 200 with
+IsErroredOnProcessing (not retried by the client), while --fail-first and
+--http-error-rate answer with --fail-status (429 or 5xx, optionally with a
+Retry-After header), which exercises the client's retry and backoff.
+
+    python benchmarks/ocr_stub_server.py --port 8089 --latency 0.4 --jitter 0.1
+    python benchmarks/ocr_stub_server.py --fail-first 2 --fail-status 429 --retry-after 1
+    OCR_SPACE_API_URL=http://127.0.0.1:8089/parse/image gunicorn app:app
+"""
+import argparse
+import io
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _image_text(data):
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return getattr(image, 'text', {}).get('po_text', '')
+    except Exception:
+        return ''
+
+
+def make_handler(latency=0.0, jitter=0.0, error_rate=0.0, seed=0, fail_first=0, http_error_rate=0.0,
+                 fail_status=503, retry_after=None):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class OCRStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # Keep-alive, like the real API
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            message = BytesParser().parsebytes(
+                b"Content-Type: " + self.headers.get('Content-Type', '').encode('latin-1') + b"\r\n\r\n" + body)
+            parts = {}
+            if message.is_multipart():
+                for part in message.get_payload():
+                    parts[part.get_param('name', header='content-disposition')] = part.get_payload(decode=True)
+
+            with rng_lock:
+                self.server.request_count += 1
+                http_failed = self.server.request_count <= fail_first or rng.random() < http_error_rate
+                delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+                failed = rng.random() < error_rate
+            time.sleep(delay)
+
+            if http_failed:
+                payload = json.dumps({"IsErroredOnProcessing": True, "ErrorMessage": ["Simulated HTTP failure"]}).encode('utf-8')
+                self.send_response(fail_status)
+                if retry_after is not None:
+                    self.send_header('Retry-After', str(retry_after))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            if failed:
+                response = {"IsErroredOnProcessing": True, "ErrorMessage": ["Simulated OCR failure"]}
+            elif 'image' not in parts:
+                response = {"IsErroredOnProcessing": True, "ErrorMessage": ["No file uploaded"]}
+            else:
+                text = _image_text(parts['image'])
+                response = {
+                    "IsErroredOnProcessing": False,
+                    "ParsedResults": [{"ParsedText": text.replace('\n', '\r\n'), "FileParseExitCode": 1}],
+                    "ProcessingTimeInMilliseconds": str(int(delay * 1000)),
+                }
+
+            payload = json.dumps(response).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return OCRStubHandler
+
+
+def start_server(port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=0, **failures):
+    """Starts the stand-in on a background thread; returns (server, url).
+
+    failures are make_handler's fail_first, http_error_rate, fail_status and
+    retry_after; server.request_count counts the POSTs received.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency, jitter, error_rate, seed, **failures))
+    server.daemon_threads = True
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, name='ocr-stub', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/parse/image"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OCR Space stand-in.")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.3, help="Seconds per request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Uniform +/- seconds added to the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with IsErroredOnProcessing")
+    parser.add_argument('--fail-first', type=int, default=0, help="Answer the first N requests with --fail-status")
+    parser.add_argument('--http-error-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with --fail-status")
+    parser.add_argument('--fail-status', type=int, default=503, help="HTTP status of simulated failures, e.g. 429 or 503")
+    parser.add_argument('--retry-after', type=int, help="Retry-After seconds sent with simulated failures")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency, args.jitter, args.error_rate, fail_first=args.fail_first,
+                               http_error_rate=args.http_error_rate, fail_status=args.fail_status,
+                               retry_after=args.retry_after)
+    print(f"OCR stand-in listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Synthetic PO documents for benchmarks, in DOCX, PDF and PNG form.
+
+Every document starts with the "Sr no.: / Name: / City: ..." block that
+extract_structured_data expects, followed by filler lines spread over the
+requested number of pages. Output is deterministic for a given seed.
+
+PNG files also carry their text in a "po_text" tEXt chunk, which the local
+OCR stand-in (ocr_stub_server.py) returns instead of running real OCR.
+
+    python benchmarks/synthetic_docs.py out_dir --count 20 --pages 3 --lines-per-page 40
+"""
+import argparse
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from record_store import DEMO_RECORDS  # noqa: E402
+
+
+FILE_TYPES = ('docx', 'pdf', 'png')
+FILLER_WORDS = "purchase order item quantity unit price total tax invoice delivery terms net payable".split()
+
+
+def document_lines(record, pages, lines_per_page, rng):
+    """Returns a list of pages, each a list of text lines; the field block opens page one."""
+    header = [f"{field}: {value}" for field, value in record.items()]
+    result = []
+    for page in range(pages):
+        lines = list(header) if page == 0 else []
+        while len(lines) < lines_per_page:
+            lines.append(" ".join(rng.choices(FILLER_WORDS, k=8)))
+        result.append(lines)
+    return result
+
+
+def make_docx(pages):
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+
+    document = Document()
+    for index, lines in enumerate(pages):
+        for line in lines:
+            document.add_paragraph(line)
+        if index < len(pages) - 1:
+            document.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(pages):
+    """Writes a minimal PDF (Helvetica text, one content stream per page) without extra dependencies."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    page_refs = []
+    for lines in pages:
+        body = "BT /F1 11 Tf 14 TL 50 800 Td\n" + "".join(f"({_pdf_escape(line)}) '\n" for line in lines) + "ET"
+        stream = body.encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>".encode()
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
+
+
+def make_png(pages, dpi=150):
+    """Renders the first page as an image; the full text is stored in a tEXt chunk for the OCR stand-in."""
+    from PIL import Image, ImageDraw
+    from PIL.PngImagePlugin import PngInfo
+
+    lines = pages[0]
+    image = Image.new('L', (int(8.27 * dpi), int(11.69 * dpi)), 255)
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(lines):
+        draw.text((40, 40 + index * 18), line, fill=0)
+    info = PngInfo()
+    info.add_text('po_text', '\n'.join(line for page in pages for line in page))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', pnginfo=info, dpi=(dpi, dpi))
+    return buffer.getvalue()
+
+
+MAKERS = {'docx': make_docx, 'pdf': make_pdf, 'png': make_png}
+
+
+def generate(file_type, index, pages=1, lines_per_page=40, seed=0):
+    """Returns (filename, bytes) for synthetic document number `index`."""
+    rng = random.Random(f"{seed}-{file_type}-{index}")
+    records = list(DEMO_RECORDS.values())
+    record = records[index % len(records)]
+    content = MAKERS[file_type](document_lines(record, pages, lines_per_page, rng))
+    return f"po_{index:05d}.{file_type}", content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic PO documents.")
+    parser.add_argument('output_dir')
+    parser.add_argument('--types', nargs='+', choices=FILE_TYPES, default=list(FILE_TYPES))
+    parser.add_argument('--count', type=int, default=10, help="Documents per file type")
+    parser.add_argument('--pages', type=int, default=1)
+    parser.add_argument('--lines-per-page', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for file_type in args.types:
+        for index in range(args.count):
+            filename, content = generate(file_type, index, args.pages, args.lines_per_page, args.seed)
+            with open(os.path.join(args.output_dir, filename), 'wb') as f:
+                f.write(content)
+    print(f"Wrote {args.count * len(args.types)} documents to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Headless bulk verification of PO documents.
+
+Runs every supported file in a directory (recursively) or a zip archive
+through the same extract -> structure -> compare pipeline as /app, spread
+over a process pool, and appends one result per file to a JSONL or CSV file
+as soon as it is ready:
+
+    python bulk_verify.py /data/po-batch --output results.jsonl --workers 8
+    python bulk_verify.py batch.zip --output results.csv --resume
+
+With --resume, files already present in the output are skipped, so an
+interrupted run continues where it stopped. Only a bounded number of files
+is in flight at once, so memory use does not grow with the size of the batch.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import app as verifier
+
+
+CSV_COLUMNS = ["file", "accuracy", "mismatched_fields", "error", "extract_seconds", "compare_seconds", "total_seconds"]
+
+# Open archives in each pool process, keyed by path
+_archives = {}
+
+
+def iter_input_files(source):
+    """Yields the names of the supported files in a directory or zip archive, in a stable order."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and verifier.extraction_engine(info.filename) is not None:
+                    yield info.filename
+        return
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if verifier.extraction_engine(name) is not None:
+                yield os.path.relpath(os.path.join(root, name), source)
+
+
+def _open_input(source, name):
+    """Returns a seekable binary file object for one input file."""
+    if os.path.isdir(source):
+        return open(os.path.join(source, name), 'rb')
+    archive = _archives.get(source)
+    if archive is None:
+        archive = _archives[source] = zipfile.ZipFile(source)
+    return io.BytesIO(archive.read(name))
+
+
+def verify_file(source, name):
+    """Process-pool entry point: verifies one file and returns its result row."""
+    started = time.perf_counter()
+    row = {"file": name, "accuracy": None, "mismatched_fields": {}, "error": None}
+    try:
+        with _open_input(source, name) as fileobj:
+            result = verifier.extract_file_stream(fileobj, os.path.basename(name))
+        extracted = time.perf_counter()
+        verifier.compare_results({name: result})
+        compared = time.perf_counter()
+
+        if 'error' in result:
+            row["error"] = result["error"]
+        else:
+            row["accuracy"] = result["accuracy"]
+            row["mismatched_fields"] = result["mismatched_fields"]
+            if verifier.is_extraction_error(result["extracted_text"]):
+                row["error"] = result["extracted_text"]
+            else:
+                row["error"] = result["comparison_error"]
+        row["extract_seconds"] = round(extracted - started, 4)
+        row["compare_seconds"] = round(compared - extracted, 4)
+    except Exception as e:
+        row["error"] = f"Processing failed for {name}: {e}"
+    row["total_seconds"] = round(time.perf_counter() - started, 4)
+    return row
+
+
+class ResultWriter:
+    """Appends result rows to a JSONL or CSV file, flushing after every row."""
+
+    def __init__(self, path, append):
+        self.path = path
+        self.is_csv = path.lower().endswith('.csv')
+        has_rows = append and os.path.exists(path) and os.path.getsize(path) > 0
+        if has_rows:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                cut_short = f.read(1) != b'\n'
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        if has_rows and cut_short:
+            self._file.write('\n') # Terminate a row the interruption cut short, so it is skipped on resume
+        write_header = not has_rows
+        if self.is_csv:
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+            if write_header:
+                self._csv.writeheader()
+
+    def write(self, row):
+        if self.is_csv:
+            self._csv.writerow({**row, "mismatched_fields": json.dumps(row.get("mismatched_fields") or {})})
+        else:
+            self._file.write(json.dumps(row) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def load_checkpoint(path):
+    """Returns the set of file names already recorded in an existing output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            # total_seconds is the last column, so a row cut short by the interruption lacks it and is redone
+            done.update(row["file"] for row in csv.DictReader(f) if row.get("file") and row.get("total_seconds"))
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["file"])
+                except (ValueError, KeyError):
+                    continue # A line cut short by the interruption; that file is simply redone
+    return done
+
+
+def run(source, output, workers, resume=False, max_in_flight=None):
+    """Verifies every file under source, writing rows to output; returns (processed, skipped)."""
+    done = load_checkpoint(output) if resume else set()
+    writer = ResultWriter(output, append=resume)
+    max_in_flight = max_in_flight or workers * 4
+    processed = skipped = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for name in iter_input_files(source):
+                if name in done:
+                    skipped += 1
+                    continue
+                if len(pending) >= max_in_flight:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        writer.write(future.result())
+                        processed += 1
+                pending.add(pool.submit(verify_file, source, name))
+
+            for future in as_completed(pending):
+                writer.write(future.result())
+                processed += 1
+    finally:
+        writer.close()
+    return processed, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify a directory or zip archive of PO documents.")
+    parser.add_argument('source', help="Directory (searched recursively) or .zip archive of documents")
+    parser.add_argument('--output', '-o', required=True, help="Results file; .csv writes CSV, anything else JSONL")
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--resume', action='store_true', help="Skip files already recorded in the output file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        parser.error(f"{args.source} does not exist")
+
+    started = time.perf_counter()
+    processed, skipped = run(args.source, args.output, max(1, args.workers), resume=args.resume)
+    print(f"Verified {processed} files ({skipped} already done) in {time.perf_counter() - started:.1f}s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Content-addressed cache for extracted text and structured data.
+
+Entries are keyed on the SHA-256 of the uploaded bytes plus the extractor and
+engine version, so re-uploading the same scan skips the PDF parse or the paid
+OCR call. Lookups go through a small in-process LRU first and then a
+size-bounded SQLite file shared by every gunicorn worker.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_db import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    structured_data TEXT,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS extraction_cache_last_access ON extraction_cache(last_access);
+"""
+
+# Internal counter -> (exported metric name, tier label); see ExtractionCache(metrics=...)
+EXPORTED_COUNTERS = {
+    'memory_hits': ('extraction_cache_hits_total', 'memory'),
+    'disk_hits': ('extraction_cache_hits_total', 'disk'),
+    'misses': ('extraction_cache_misses_total', None),
+    'stores': ('extraction_cache_stores_total', None),
+    'memory_evictions': ('extraction_cache_evictions_total', 'memory'),
+    'disk_evictions': ('extraction_cache_evictions_total', 'disk'),
+}
+
+
+def hash_stream(fileobj, chunk_size=1024 * 1024):
+    """Returns the hex SHA-256 digest of a seekable binary file object, read in chunks from the start."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Two-tier (memory LRU + SQLite) cache of (text, structured_data) pairs.
+
+    Both tiers evict least-recently-used entries: the memory tier once it holds
+    more than max_entries, the disk tier once the stored text and data exceed
+    max_disk_bytes. Either limit set to 0 disables that tier.
+
+    When metrics (anything with an inc(name, labels, amount) method) is given,
+    hits, misses, stores and evictions are also counted there.
+    """
+
+    def __init__(self, db_path, max_entries=256, max_disk_bytes=256 * 1024 * 1024, metrics=None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.metrics = metrics
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0,
+                          'memory_evictions': 0, 'disk_evictions': 0}
+
+        if self.max_disk_bytes:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            with connect(self.db_path) as conn:
+                conn.executescript(SCHEMA)
+
+    @staticmethod
+    def make_key(content_hash, extractor, version):
+        """Builds a cache key from the content hash and the extractor/engine that produced the text."""
+        return f"{content_hash}:{extractor}:{version}"
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+        if self.metrics is not None:
+            name, tier = EXPORTED_COUNTERS[counter]
+            self.metrics.inc(name, {'tier': tier} if tier else None, amount)
+
+    def _remember(self, key, entry):
+        """Adds an entry to the memory tier, evicting the least recently used ones."""
+        if not self.max_entries:
+            return
+        evicted = 0
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count('memory_evictions', evicted)
+
+    def get(self, key):
+        """Returns (text, structured_data) for key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is not None:
+            self._count('memory_hits')
+            return entry
+
+        if self.max_disk_bytes:
+            with connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT text, structured_data FROM extraction_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE extraction_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            if row is not None:
+                entry = (row[0], json.loads(row[1]) if row[1] is not None else None)
+                self._remember(key, entry)
+                self._count('disk_hits')
+                return entry
+
+        self._count('misses')
+        return None
+
+    def put(self, key, text, structured_data=None):
+        """Stores an entry in both tiers. Callers must not pass error results."""
+        entry = (text, structured_data)
+        self._remember(key, entry)
+        self._count('stores')
+
+        if not self.max_disk_bytes:
+            return
+        data_json = json.dumps(structured_data) if structured_data is not None else None
+        size = len(text.encode('utf-8')) + (len(data_json) if data_json else 0)
+        if size > self.max_disk_bytes:
+            return
+
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, text, structured_data, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, text, data_json, size, time.time()),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_cache").fetchone()[0]
+            evicted = 0
+            while total > self.max_disk_bytes:
+                oldest = conn.execute(
+                    "SELECT key, size FROM extraction_cache ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                conn.execute("DELETE FROM extraction_cache WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                evicted += 1
+        if evicted:
+            self._count('disk_evictions', evicted)
+
+    def stats(self):
+        """Returns this process's hit/miss/eviction counters and the current tier sizes."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+        if self.max_disk_bytes:
+            with connect(self.db_path) as conn:
+                stats['disk_entries'], stats['disk_bytes'] = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extraction_cache"
+                ).fetchone()
+        return stats
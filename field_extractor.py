@@ -0,0 +1,84 @@
+"""Schema-driven extraction of "Label: value" fields from document text.
+
+The schema is compiled once into a single alternation pattern, so a document
+is scanned in one pass over its lines regardless of how many fields are
+configured, and scanning stops as soon as every field has been found.
+"""
+import hashlib
+import json
+import re
+
+
+# Fields extracted by default, in display order
+DEFAULT_FIELD_SCHEMA = [
+    {"name": "Sr no."},
+    {"name": "Name"},
+    {"name": "City"},
+    {"name": "Age"},
+    {"name": "Country"},
+    {"name": "Address"},
+]
+
+
+class FieldExtractor:
+    """Extracts the fields described by a schema from text in a single pass.
+
+    Each schema entry is a dict with:
+      name     -- key used in the result dict
+      aliases  -- optional list of other labels for the same field
+      pattern  -- optional regex the value must fully match; lines whose value
+                  does not match are skipped and scanning continues
+    The first matching line wins for each field, as in the original extractor.
+    """
+
+    def __init__(self, schema=None):
+        self.schema = schema or DEFAULT_FIELD_SCHEMA
+        self.field_names = [field["name"] for field in self.schema]
+        self.fingerprint = hashlib.sha256(json.dumps(self.schema, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+        labels = {} # lower-cased label -> field name
+        self._value_patterns = {}
+        for field in self.schema:
+            for label in [field["name"]] + list(field.get("aliases", [])):
+                labels[label.lower()] = field["name"]
+            if field.get("pattern"):
+                self._value_patterns[field["name"]] = re.compile(field["pattern"], re.IGNORECASE)
+        self._labels = labels
+
+        # Longest label first, so a label that prefixes another cannot shadow it
+        alternation = "|".join(re.escape(label) for label in sorted(labels, key=len, reverse=True))
+        # Horizontal whitespace only, so a match never spans lines
+        self._pattern = re.compile(
+            r"^[^\S\n]*(" + alternation + r")[^\S\n]*:[^\S\n]*(.*)",
+            re.IGNORECASE | re.MULTILINE,
+        )
+
+    @classmethod
+    def from_json_file(cls, path):
+        """Builds an extractor from a JSON file holding a list of schema entries."""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def extract(self, text):
+        """Returns a dict of every schema field, with None for fields not found."""
+        data = dict.fromkeys(self.field_names)
+        remaining = len(self.field_names)
+        search = self._pattern.search
+
+        # The regex engine skips non-matching lines itself, so Python only sees labelled lines
+        position = 0
+        while remaining:
+            match = search(text, position)
+            if match is None:
+                break
+            position = match.end() + 1
+            field = self._labels[match.group(1).lower()]
+            if data[field] is not None:
+                continue
+            value = match.group(2).strip()
+            value_pattern = self._value_patterns.get(field)
+            if value_pattern is not None and not value_pattern.fullmatch(value):
+                continue
+            data[field] = value
+            remaining -= 1 # Stop early once every field has been found
+        return data
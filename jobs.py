@@ -0,0 +1,297 @@
+"""Background job queue for document verification.
+
+Jobs and their files are kept in a local SQLite database so that every gunicorn
+worker sees the same state and queued work survives a worker restart. Each
+process runs a small dispatcher thread that claims queued files from the
+database and hands them to a bounded thread pool.
+
+While a file is being processed its claiming process refreshes a heartbeat;
+files whose heartbeat stops (the worker died) are requeued. Every claim
+carries a unique token, and a result is only stored by the claim that still
+holds the file, so a requeued file is never finished twice.
+"""
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlite_db import connect
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    path TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    claimed_at REAL,
+    claim_token TEXT,
+    heartbeat_at REAL,
+    finished_at REAL,
+    result TEXT,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+# Columns added after the first release, for job databases created before them
+ADDED_COLUMNS = {'claim_token': 'TEXT', 'heartbeat_at': 'REAL'}
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS job_files_heartbeat ON job_files(status, heartbeat_at);
+"""
+
+# File states: queued -> running -> done | failed
+FINISHED_STATES = ('done', 'failed')
+
+
+class JobQueue:
+    """SQLite-backed job queue processed by a local worker pool."""
+
+    def __init__(self, db_path, upload_dir, process_file, max_workers=2, stale_after=120, poll_interval=1.0):
+        """process_file(path, filename) must return a JSON-serialisable result dict.
+
+        A running file whose heartbeat is older than stale_after seconds is requeued;
+        heartbeats are refreshed four times per stale_after period.
+        """
+        self.db_path = db_path
+        self.upload_dir = upload_dir
+        self.process_file = process_file
+        self.max_workers = max_workers
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = max(poll_interval, stale_after / 4)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor = None
+        self._dispatcher = None
+        self._pid = None # Process that created the executor
+        self._in_flight = 0
+        self._running = {} # claim token -> (job_id, position), for this process's heartbeats
+        self._last_heartbeat = 0.0
+
+        os.makedirs(upload_dir, exist_ok=True)
+        with connect(self.db_path, sqlite3.Row) as conn:
+            conn.executescript(SCHEMA)
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(job_files)")}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE job_files ADD COLUMN {column} {column_type}")
+            conn.executescript(INDEXES)
+
+    # --- Worker pool ---
+    def start(self):
+        """Starts the dispatcher thread for this process (no-op if already running)."""
+        with self._lock:
+            if self._dispatcher is not None and self._dispatcher.is_alive():
+                return
+            if self._pid != os.getpid():
+                # First start, or a forked child: the parent's pool threads and claims are not inherited.
+                # Otherwise the existing pool and its in-flight files are kept, so they go on heartbeating.
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+                self._in_flight = 0
+                self._running = {}
+                self._pid = os.getpid()
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        while True:
+            try:
+                self._dispatch_once()
+            except Exception:
+                # e.g. sqlite3.OperationalError under lock contention; the next round retries
+                logger.exception("Job dispatcher round failed")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _dispatch_once(self):
+        """Heartbeats running files, requeues stale ones and claims queued files for free pool slots."""
+        self._heartbeat()
+        self._requeue_stale()
+        while True:
+            with self._lock:
+                free_slots = self.max_workers - self._in_flight
+            if free_slots <= 0:
+                return
+            claimed = self._claim()
+            if claimed is None:
+                return
+            with self._lock:
+                self._in_flight += 1
+            self._executor.submit(self._run, claimed)
+
+    def _heartbeat(self):
+        """Refreshes the heartbeat of every file this process is working on, at most once per heartbeat_interval."""
+        now = time.monotonic()
+        if now - self._last_heartbeat < self.heartbeat_interval:
+            return
+        self._last_heartbeat = now
+        with self._lock:
+            tokens = list(self._running)
+        if not tokens:
+            return
+        with connect(self.db_path, sqlite3.Row) as conn:
+            conn.executemany(
+                "UPDATE job_files SET heartbeat_at = ? WHERE claim_token = ? AND status = 'running'",
+                [(time.time(), token) for token in tokens],
+            )
+
+    def _requeue_stale(self):
+        """Puts back files whose worker died (e.g. a gunicorn worker restart) mid-processing."""
+        with connect(self.db_path, sqlite3.Row) as conn:
+            conn.execute(
+                "UPDATE job_files SET status = 'queued', claimed_at = NULL, claim_token = NULL, heartbeat_at = NULL "
+                "WHERE status = 'running' AND COALESCE(heartbeat_at, claimed_at) < ?",
+                (time.time() - self.stale_after,),
+            )
+
+    def _claim(self):
+        """Atomically claims the oldest queued file, so only one worker process picks it up."""
+        with connect(self.db_path, sqlite3.Row) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT f.job_id, f.position, f.filename, f.path FROM job_files f JOIN jobs j ON j.id = f.job_id "
+                "WHERE f.status = 'queued' ORDER BY j.created_at, f.position LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = dict(row, token=uuid.uuid4().hex)
+            now = time.time()
+            conn.execute(
+                "UPDATE job_files SET status = 'running', claimed_at = ?, heartbeat_at = ?, claim_token = ? "
+                "WHERE job_id = ? AND position = ?",
+                (now, now, claimed['token'], row['job_id'], row['position']),
+            )
+        with self._lock:
+            self._running[claimed['token']] = (claimed['job_id'], claimed['position'])
+        return claimed
+
+    def _run(self, claimed):
+        try:
+            try:
+                result = self.process_file(claimed['path'], claimed['filename'])
+                status = 'failed' if 'error' in result else 'done'
+            except Exception as e:
+                result = {"error": f"Processing failed for {claimed['filename']}: {e}"}
+                status = 'failed'
+            # A claim that lost the file (requeued and picked up elsewhere) leaves the upload to the new claim
+            if self._finish_file(claimed, status, result) and claimed['path'] and os.path.exists(claimed['path']):
+                os.remove(claimed['path'])
+        except Exception:
+            # The file stays 'running' without a heartbeat and is requeued after stale_after
+            logger.exception("Could not store the result of %s", claimed['filename'])
+        finally:
+            with self._lock:
+                self._running.pop(claimed['token'], None)
+                self._in_flight -= 1
+            self._wakeup.set()
+
+    def _finish_file(self, claimed, status, result):
+        """Stores a file's result if this claim still holds it; returns whether it did."""
+        job_id = claimed['job_id']
+        now = time.time()
+        with connect(self.db_path, sqlite3.Row) as conn:
+            updated = conn.execute(
+                "UPDATE job_files SET status = ?, finished_at = ?, result = ?, claim_token = NULL "
+                "WHERE job_id = ? AND position = ? AND claim_token = ? AND status = 'running'",
+                (status, now, json.dumps(result), job_id, claimed['position'], claimed['token']),
+            ).rowcount
+            if not updated:
+                return False
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM job_files WHERE job_id = ? AND status NOT IN ('done', 'failed')", (job_id,)
+            ).fetchone()[0]
+            if remaining == 0:
+                conn.execute("UPDATE jobs SET finished_at = ? WHERE id = ?", (now, job_id))
+        if remaining == 0:
+            shutil.rmtree(os.path.join(self.upload_dir, job_id), ignore_errors=True)
+        return True
+
+    # --- Public API ---
+    def submit(self, uploads):
+        """Stores the uploaded files and queues them; returns the new job id.
+
+        uploads is a list of Werkzeug FileStorage objects, kept in upload order.
+        Empty file inputs are recorded as failed entries straight away.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.upload_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        now = time.time()
+        rows = []
+        for position, upload in enumerate(uploads):
+            filename = upload.filename
+            if filename == '':
+                rows.append((job_id, position, f"Skipped empty file input ({position + 1})", None, 'failed', now,
+                             json.dumps({"error": "Skipped empty file input."})))
+                continue
+            path = os.path.join(job_dir, f"{position}_{os.path.basename(filename)}")
+            upload.save(path)
+            rows.append((job_id, position, filename, path, 'queued', None, None))
+
+        with connect(self.db_path, sqlite3.Row) as conn:
+            conn.execute("INSERT INTO jobs (id, created_at) VALUES (?, ?)", (job_id, now))
+            conn.executemany(
+                "INSERT INTO job_files (job_id, position, filename, path, status, finished_at, result) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if all(row[4] == 'failed' for row in rows):
+                conn.execute("UPDATE jobs SET finished_at = ? WHERE id = ?", (now, job_id))
+
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def status(self, job_id):
+        """Returns the job's progress and per-file results, or None for an unknown job."""
+        with connect(self.db_path, sqlite3.Row) as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            files = conn.execute(
+                "SELECT position, filename, status, result FROM job_files WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        file_entries = []
+        for row in files:
+            counts[row['status']] += 1
+            file_entries.append({
+                "position": row['position'],
+                "filename": row['filename'],
+                "status": row['status'],
+                "result": json.loads(row['result']) if row['result'] else None,
+            })
+
+        finished = sum(counts[state] for state in FINISHED_STATES)
+        if finished == len(file_entries):
+            job_status = 'finished'
+        elif counts['running'] or finished:
+            job_status = 'running'
+        else:
+            job_status = 'queued'
+
+        return {
+            "job_id": job_id,
+            "status": job_status,
+            "created_at": job['created_at'],
+            "finished_at": job['finished_at'],
+            "total": len(file_entries),
+            "counts": counts,
+            "files": file_entries,
+        }
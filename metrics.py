@@ -0,0 +1,347 @@
+"""Per-stage latency and size instrumentation with Prometheus-format export.
+
+Each process accumulates counters and histograms in memory, and a background
+thread writes them (whenever they changed, at most once per flush_interval,
+and once more at exit) to <directory>/<pid>-<token>.json, where the token is
+random per process, so a new worker that reuses a dead worker's PID never
+overwrites its totals. The /metrics endpoint merges every snapshot in the
+directory, so a scrape of any gunicorn worker reports totals for all of them.
+While merging, the snapshots of exited processes are folded into a single
+exited.json, which keeps their counts (counters do not go backwards) without
+letting the directory grow with every worker restart. Compaction needs fcntl
+file locks; without them exited snapshots are simply kept.
+
+Stage timings of the current request are also collected for a Server-Timing
+response header. They live in a context variable, so work handed to a
+thread pool is included when submitted through contextvars.copy_context().run.
+"""
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import fcntl
+except ImportError: # Windows: no compaction of exited snapshots
+    fcntl = None
+
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'stage_seconds': ('histogram', "Time spent in each processing stage, per file type."),
+    'stage_bytes_total': ('counter', "Bytes handled by each processing stage, per file type."),
+    'request_seconds': ('histogram', "HTTP request latency, per endpoint."),
+    'requests_total': ('counter', "HTTP requests, per endpoint, method and status."),
+    'files_processed_total': ('counter', "Uploaded files processed, per file type and outcome."),
+    'bytes_processed_total': ('counter', "Bytes of uploaded files processed, per file type."),
+    'ocr_errors_total': ('counter', "OCR calls that returned an error, per engine."),
+    'extraction_cache_hits_total': ('counter', "Extraction cache hits, per tier."),
+    'extraction_cache_misses_total': ('counter', "Extraction cache lookups that found nothing in either tier."),
+    'extraction_cache_stores_total': ('counter', "Entries written to the extraction cache."),
+    'extraction_cache_evictions_total': ('counter', "Extraction cache entries evicted, per tier."),
+}
+
+_request_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Wall-clock span of each stage within one request.
+
+    Files of one upload run concurrently, so a stage's span runs from its
+    first start to its last end rather than summing per-file durations, and
+    never exceeds the request total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {} # stage -> [first start, last end, calls]
+        self._lock = threading.Lock()
+
+    def add(self, stage, started, ended):
+        with self._lock:
+            span = self.stages.get(stage)
+            if span is None:
+                self.stages[stage] = [started, ended, 1]
+            else:
+                span[0] = min(span[0], started)
+                span[1] = max(span[1], ended)
+                span[2] += 1
+
+    def server_timing(self):
+        """Returns the value of a Server-Timing header for the stages seen so far."""
+        with self._lock:
+            entries = [f'{stage};dur={(ended - started) * 1000:.1f};desc="span, calls={calls}"'
+                       for stage, (started, ended, calls) in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ', '.join(entries)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True # Exists but belongs to another user
+    return True
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+class Metrics:
+    """Process-local counters and histograms, shared with other processes through snapshot files."""
+
+    def __init__(self, directory, prefix='ocr_app', buckets=DEFAULT_BUCKETS, flush_interval=1.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.flush_interval = flush_interval
+
+        self._counters = {} # (name, label key) -> value
+        self._histograms = {} # (name, label key) -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = 0.0
+        self._dirty = False # Recorded since the last snapshot was written
+        self._pid = None # Process the counters and snapshot file belong to
+        self._snapshot_path = None
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self._flush_at_exit)
+
+    def _check_process(self):
+        """Sets up this process's snapshot file and background flusher on first use.
+
+        A forked child (e.g. under gunicorn --preload) starts with empty counters:
+        whatever it inherited is reported by the parent's own snapshot.
+        """
+        pid = os.getpid()
+        if pid == self._pid:
+            return
+        with self._lock:
+            if pid == self._pid:
+                return
+            if self._pid is not None:
+                self._counters.clear()
+                self._histograms.clear()
+            self._snapshot_path = os.path.join(self.directory, f"{pid}-{uuid.uuid4().hex}.json")
+            self._dirty = False
+            self._pid = pid
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    # --- Recording ---
+    def inc(self, name, labels=None, amount=1):
+        self._check_process()
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty = True
+
+    def observe(self, name, value, labels=None):
+        self._check_process()
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._dirty = True
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @contextmanager
+    def stage(self, stage, file_type, size=None):
+        """Times a processing stage; also counts `size` bytes for it when given."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            labels = {'stage': stage, 'file_type': file_type}
+            self.observe('stage_seconds', ended - started, labels)
+            if size is not None:
+                self.inc('stage_bytes_total', labels, size)
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.add(stage, started, ended)
+
+    # --- Per-request timings ---
+    @staticmethod
+    def start_request():
+        """Starts collecting stage timings for the current request."""
+        timings = RequestTimings()
+        _request_timings.set(timings)
+        return timings
+
+    @staticmethod
+    def current_request():
+        return _request_timings.get()
+
+    # --- Cross-process export ---
+    def flush(self, force=False):
+        """Writes this process's snapshot, at most once per flush_interval unless forced."""
+        self._check_process()
+        with self._flush_lock:
+            now = time.monotonic()
+            if not force and now - self._last_flush < self.flush_interval:
+                return
+            self._last_flush = now
+            with self._lock:
+                snapshot = self._snapshot(self._counters, self._histograms)
+                self._dirty = False
+            self._write(self._snapshot_path, snapshot)
+
+    def _flush_loop(self):
+        """Publishes new counts every flush_interval, including those recorded by background
+        threads or after a worker's last request."""
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                try:
+                    self.flush(force=True)
+                except OSError:
+                    self._dirty = True # e.g. METRICS_DIR briefly unavailable; retried next round
+
+    def _flush_at_exit(self):
+        if self._pid == os.getpid() and self._dirty:
+            self.flush(force=True)
+
+    @staticmethod
+    def _snapshot(counters, histograms):
+        return {
+            'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, dict(labels), values] for (name, labels), values in histograms.items()],
+        }
+
+    def _write(self, path, data):
+        """Writes JSON through a uniquely named temp file and an atomic rename, so readers never see a partial file."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @staticmethod
+    def _add_snapshot(counters, histograms, snapshot):
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, _label_key(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot.get('histograms', []):
+            key = (name, _label_key(labels))
+            merged = histograms.get(key)
+            histograms[key] = values if merged is None else [a + b for a, b in zip(merged, values)]
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @contextmanager
+    def _directory_lock(self):
+        """Serialises merging and compaction across processes; yields False when file locks are unavailable."""
+        if fcntl is None:
+            yield False
+            return
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _merged(self):
+        counters, histograms = {}, {}
+        exited_path = os.path.join(self.directory, 'exited.json')
+        with self._directory_lock() as can_compact:
+            exited = self._load(exited_path) or {}
+            # Snapshots already folded into exited.json; only trusted while the file is still there
+            folded = set(exited.get('snapshots', []))
+            dead = []
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                name = os.path.basename(path)
+                if path == exited_path:
+                    continue
+                if name in folded: # Left behind by an interrupted compaction
+                    if can_compact:
+                        os.unlink(path)
+                    continue
+                snapshot = self._load(path)
+                if snapshot is None:
+                    continue
+                pid = name[:-len('.json')].split('-', 1)[0] # Also accepts older <pid>.json snapshots
+                if can_compact and pid.isdigit() and not _pid_alive(int(pid)):
+                    dead.append((path, snapshot))
+                else:
+                    self._add_snapshot(counters, histograms, snapshot)
+
+            if dead:
+                exited_counters, exited_histograms = {}, {}
+                self._add_snapshot(exited_counters, exited_histograms, exited)
+                for _, snapshot in dead:
+                    self._add_snapshot(exited_counters, exited_histograms, snapshot)
+                exited = self._snapshot(exited_counters, exited_histograms)
+                exited['snapshots'] = [os.path.basename(path) for path, _ in dead] + \
+                    [name for name in folded if os.path.exists(os.path.join(self.directory, name))]
+                self._write(exited_path, exited)
+                # Removed only after exited.json records them, so a crash here never counts them twice
+                for path, _ in dead:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+
+            self._add_snapshot(counters, histograms, exited)
+        return counters, histograms
+
+    def render(self):
+        """Returns all processes' metrics in the Prometheus text exposition format."""
+        self.flush(force=True)
+        counters, histograms = self._merged()
+
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+            return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+        lines = []
+        for name in sorted({name for name, _ in counters} | {name for name, _ in histograms}):
+            metric = f"{self.prefix}_{name}"
+            default_kind = 'histogram' if any(series == name for series, _ in histograms) else 'counter'
+            kind, help_text = METRIC_HELP.get(name, (default_kind, name))
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for (series, labels), value in sorted(counters.items()):
+                if series == name:
+                    lines.append(f"{metric}{label_text(labels)} {value}")
+            for (series, labels), values in sorted(histograms.items()):
+                if series != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets, values):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{label_text(labels, [('le', repr(bound))])} {cumulative}")
+                lines.append(f"{metric}_bucket{label_text(labels, [('le', '+Inf')])} {values[-1]}")
+                lines.append(f"{metric}_sum{label_text(labels)} {values[-2]}")
+                lines.append(f"{metric}_count{label_text(labels)} {values[-1]}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,168 @@
+"""HTTP client for the OCR Space API.
+
+One OCRSpaceClient is shared by every thread in a process. It keeps a pooled
+keep-alive session, applies connect/read timeouts, retries 5xx and throttling
+responses with exponential backoff, paces calls with a token bucket and
+streams the image as a multipart body instead of reading it into memory.
+
+Every call is a paid POST, so transport errors are only retried when the
+request cannot have reached the API (connect timeouts and refused or
+unresolvable connections); a read timeout is raised straight away.
+"""
+import os
+import random
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+
+# Responses worth retrying: throttling and transient server-side failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _request_not_sent(error):
+    """Returns True for transport errors raised before the request reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` calls per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then takes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class MultipartStream:
+    """File-like multipart/form-data body that reads the file part lazily.
+
+    requests streams any object with read() and a `len` attribute, sending a
+    Content-Length header instead of buffering the whole upload.
+    """
+
+    def __init__(self, fields, file_field, filename, fileobj, content_type='application/octet-stream'):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        head = b''
+        for name, value in fields.items():
+            head += (f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                     f"{value}\r\n").encode('utf-8')
+        head += (f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{file_field}\"; "
+                 f"filename=\"{filename}\"\r\nContent-Type: {content_type}\r\n\r\n").encode('utf-8')
+        tail = f"\r\n--{self.boundary}--\r\n".encode('utf-8')
+
+        start = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        file_size = fileobj.tell() - start
+        fileobj.seek(start)
+
+        self._parts = [head, fileobj, tail]
+        self._current = 0
+        self._offset = 0
+        self.len = len(head) + file_size + len(tail)
+
+    def read(self, size=-1):
+        chunks = []
+        remaining = size if size is not None and size >= 0 else None
+        while self._current < len(self._parts) and (remaining is None or remaining > 0):
+            part = self._parts[self._current]
+            if isinstance(part, bytes):
+                end = len(part) if remaining is None else min(len(part), self._offset + remaining)
+                chunk = part[self._offset:end]
+                self._offset = end
+                if self._offset >= len(part):
+                    self._current += 1
+                    self._offset = 0
+            else:
+                chunk = part.read() if remaining is None else part.read(remaining)
+                if not chunk:
+                    self._current += 1
+                    continue
+            chunks.append(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+        return b''.join(chunks)
+
+
+class OCRSpaceClient:
+    """Pooled, retrying, rate-limited client for the OCR Space parse endpoint."""
+
+    def __init__(self, api_url, api_key, connect_timeout=5, read_timeout=60, max_retries=3,
+                 backoff_factor=0.5, max_backoff=30, rate_limit=None, rate_burst=None, pool_size=10):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst) if rate_limit else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt, response=None):
+        """Seconds to wait before the next attempt, honouring a Retry-After header if given."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(self.max_backoff, int(retry_after))
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(self.max_backoff, delay + random.uniform(0, delay / 2))
+
+    def parse_image(self, fileobj, filename='image.png', language='eng', **options):
+        """Sends an image file object for OCR and returns the decoded JSON response.
+
+        fileobj must be seekable so the upload can be replayed on a retry.
+        Raises requests.exceptions.RequestException once retries are exhausted.
+        """
+        fields = {'apikey': self.api_key, 'language': language, **options}
+        start = fileobj.tell()
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            fileobj.seek(start)
+            body = MultipartStream(fields, 'image', filename, fileobj)
+            response = None
+            try:
+                response = self.session.post(self.api_url, data=body, timeout=self.timeout,
+                                             headers={'Content-Type': body.content_type})
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+            except requests.exceptions.ConnectionError as e:
+                if attempt >= self.max_retries or not _request_not_sent(e):
+                    raise
+
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
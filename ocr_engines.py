@@ -0,0 +1,173 @@
+"""Pluggable OCR engines.
+
+Every engine exposes a `name` (used in extraction cache keys) and
+recognize(fileobj, filename), which returns the recognised text or, like the
+other extractors, an error message string instead of raising.
+
+- OCRSpaceEngine sends the image to the OCR Space API.
+- TesseractEngine runs Tesseract locally on Pillow-preprocessed pages, in a
+  process pool so throughput scales with the available cores.
+- FallbackEngine tries one engine and falls back to another on error.
+"""
+import io
+import os
+import shutil
+
+import requests
+
+from process_pool import LazyProcessPool
+
+
+class OCREngine:
+    """Base class for OCR engines."""
+
+    name = 'ocr'
+
+    def recognize(self, fileobj, filename):
+        """Returns the text of the image in fileobj (a seekable binary file object), or an error message."""
+        raise NotImplementedError
+
+
+class OCRSpaceEngine(OCREngine):
+    """Remote OCR through the OCR Space API."""
+
+    def __init__(self, client, language='eng'):
+        self.client = client
+        self.language = language
+        self.name = f"ocrspace-{language}"
+
+    def recognize(self, fileobj, filename):
+        try:
+            result = self.client.parse_image(fileobj, filename=filename, language=self.language)
+
+            if result and not result.get('IsErroredOnProcessing'):
+                text = result.get('ParsedResults')[0].get('ParsedText') if result.get('ParsedResults') else "No text found in image."
+                return text.strip()
+            else:
+                error_message = result.get('ErrorMessage') or "Unknown error from OCR Space API."
+                return f"OCR Space API Error: {error_message}"
+
+        except requests.exceptions.RequestException as e:
+            return f"Error connecting to OCR Space API: {e}"
+        except Exception as e:
+            return f"Error during OCR processing: {e}"
+
+
+def otsu_threshold(histogram):
+    """Returns the grey level that best separates a 256-bin histogram into ink and paper."""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background_count = background_sum = 0
+    best_level, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def preprocess_page(image, target_dpi=300, max_dimension=4000, threshold=None):
+    """Grayscale, DPI-normalised downscale and binarisation of one page.
+
+    Pages scanned above target_dpi are scaled down to it, and the longest side
+    is capped at max_dimension. threshold=None picks one with Otsu's method.
+    """
+    from PIL import Image
+
+    page = image.convert('L')
+
+    scale = 1.0
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0] and dpi[0] > target_dpi:
+        scale = target_dpi / float(dpi[0])
+    longest = max(page.size) * scale
+    if max_dimension and longest > max_dimension:
+        scale *= max_dimension / longest
+    if scale < 1.0:
+        page = page.resize((max(1, int(page.width * scale)), max(1, int(page.height * scale))), Image.LANCZOS)
+
+    level = otsu_threshold(page.histogram()) if threshold is None else threshold
+    return page.point(lambda value: 255 if value > level else 0, mode='1')
+
+
+def _tesseract_ocr_bytes(data, language, target_dpi, max_dimension, threshold, config):
+    """Process-pool entry point: OCRs every page (TIFF frame) of an image."""
+    import pytesseract
+    from PIL import Image, ImageSequence
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            pages = []
+            for frame in ImageSequence.Iterator(image):
+                page = preprocess_page(frame, target_dpi, max_dimension, threshold)
+                pages.append(pytesseract.image_to_string(page, lang=language, config=config).strip())
+    except Exception as e:
+        # pytesseract's exceptions cannot be unpickled in the parent, which would break the whole pool
+        raise RuntimeError(str(e)) from None
+    return '\n'.join(pages)
+
+
+class TesseractEngine(OCREngine):
+    """Local OCR with Tesseract (via pytesseract), run on a lazily created process pool."""
+
+    def __init__(self, language='eng', process_workers=None, target_dpi=300, max_dimension=4000,
+                 threshold=None, config=''):
+        """process_workers=0 runs in the calling thread; None uses one process per core."""
+        self.language = language
+        self.process_workers = (os.cpu_count() or 1) if process_workers is None else process_workers
+        self.target_dpi = target_dpi
+        self.max_dimension = max_dimension
+        self.threshold = threshold
+        self.config = config
+        # Part of the extraction cache key, so it names every setting that changes the recognised text
+        self.name = (f"tesseract-{language}-{target_dpi}dpi-max{max_dimension}-"
+                     f"{threshold if threshold is not None else 'otsu'}-config={config}")
+        self._pool = LazyProcessPool(self.process_workers)
+
+    @staticmethod
+    def available():
+        """Returns True if the tesseract binary and pytesseract are installed."""
+        try:
+            import pytesseract
+        except ImportError:
+            return False
+        return shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+    def recognize(self, fileobj, filename):
+        try:
+            args = (fileobj.read(), self.language, self.target_dpi, self.max_dimension, self.threshold, self.config)
+            if not self.process_workers:
+                text = _tesseract_ocr_bytes(*args)
+            else:
+                text = self._pool.submit(_tesseract_ocr_bytes, *args).result()
+            return text.strip() or "No text found in image."
+        except Exception as e:
+            return f"Error during local OCR processing: {e}"
+
+
+class FallbackEngine(OCREngine):
+    """Uses the primary engine and retries with the secondary one when it returns an error."""
+
+    def __init__(self, primary, secondary, is_error):
+        """is_error(text) decides whether a result is an error message."""
+        self.primary = primary
+        self.secondary = secondary
+        self.is_error = is_error
+        self.name = f"{primary.name}+{secondary.name}"
+
+    def recognize(self, fileobj, filename):
+        start = fileobj.tell()
+        text = self.primary.recognize(fileobj, filename)
+        if not self.is_error(text):
+            return text
+        fileobj.seek(start)
+        return self.secondary.recognize(fileobj, filename)
@@ -0,0 +1,102 @@
+"""Page-streaming PDF text extraction built on pdfminer.six.
+
+Pages are converted one at a time so extraction can stop as soon as every
+schema field has been seen (the PO header is nearly always on page one).
+pdfminer is pure Python and holds the GIL, so the parsing itself can be sent
+to a process pool.
+"""
+import io
+
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from field_extractor import FieldExtractor
+from process_pool import LazyProcessPool
+
+
+def make_laparams(settings):
+    """Builds LAParams from a dict of keyword arguments.
+
+    Layout analysis cannot be switched off entirely: without it pdfminer emits
+    no line breaks and the "Label: value" lines run together. For speed, pass
+    e.g. {"boxes_flow": None} to skip the reading-order pass.
+    """
+    return LAParams(**(settings or {}))
+
+
+def iter_pdf_pages(pdf_file, laparams, maxpages=0):
+    """Yields the text of each page of a PDF (a binary file object), in order.
+
+    The text matches what pdfminer's extract_text produces for the same pages.
+    """
+    output = io.StringIO()
+    resource_manager = PDFResourceManager(caching=True)
+    device = TextConverter(resource_manager, output, codec='utf-8', laparams=laparams)
+    interpreter = PDFPageInterpreter(resource_manager, device)
+    try:
+        for page in PDFPage.get_pages(pdf_file, maxpages=maxpages, caching=True):
+            interpreter.process_page(page)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    finally:
+        device.close()
+
+
+def extract_pdf_text(pdf_file, laparams, maxpages=0, field_extractor=None):
+    """Returns the text of a PDF, stopping after the page on which the last
+    field of field_extractor's schema was found (if an extractor is given)."""
+    pages = []
+    missing = set(field_extractor.field_names) if field_extractor is not None else None
+    for page_text in iter_pdf_pages(pdf_file, laparams=laparams, maxpages=maxpages):
+        pages.append(page_text)
+        if missing is not None:
+            found = field_extractor.extract(page_text)
+            missing.difference_update(name for name, value in found.items() if value is not None)
+            if not missing:
+                break
+    return ''.join(pages)
+
+
+# Extractors built inside pool processes, keyed by schema fingerprint
+_process_extractors = {}
+
+
+def _extract_pdf_bytes(data, laparams_settings, maxpages, schema):
+    """Process-pool entry point: everything passed in must be picklable."""
+    field_extractor = None
+    if schema is not None:
+        field_extractor = FieldExtractor(schema)
+        field_extractor = _process_extractors.setdefault(field_extractor.fingerprint, field_extractor)
+    return extract_pdf_text(io.BytesIO(data), make_laparams(laparams_settings), maxpages, field_extractor)
+
+
+class PDFTextExtractor:
+    """Configured PDF extraction, run in-thread or on a lazily created process pool."""
+
+    def __init__(self, process_workers=0, maxpages=0, laparams_settings=None, field_extractor=None):
+        """laparams_settings is a dict of LAParams keyword arguments (see make_laparams).
+        field_extractor enables early exit once all of its fields have been found."""
+        self.process_workers = process_workers
+        self.maxpages = maxpages
+        self.laparams_settings = laparams_settings
+        self.field_extractor = field_extractor
+        self._pool = LazyProcessPool(self.process_workers)
+
+    @property
+    def settings_tag(self):
+        """Short description of the settings that affect the extracted text (used in cache keys)."""
+        layout = ','.join(f"{key}={value}" for key, value in sorted((self.laparams_settings or {}).items())) or 'default'
+        early_exit = 'early' if self.field_extractor is not None else 'full'
+        return f"{layout};pages={self.maxpages};{early_exit}"
+
+    def extract(self, pdf_file):
+        """Returns the text of a PDF given as a binary file object."""
+        if not self.process_workers:
+            return extract_pdf_text(pdf_file, make_laparams(self.laparams_settings), self.maxpages, self.field_extractor)
+
+        schema = self.field_extractor.schema if self.field_extractor is not None else None
+        future = self._pool.submit(_extract_pdf_bytes, pdf_file.read(), self.laparams_settings, self.maxpages, schema)
+        return future.result()
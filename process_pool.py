@@ -0,0 +1,33 @@
+"""Lazily created process pool for CPU-bound extraction work (PDF parsing, local OCR)."""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class LazyProcessPool:
+    """A ProcessPoolExecutor that is only started on first use and is safe to share between threads.
+
+    Worker processes are spawned rather than forked: forking a threaded gunicorn
+    worker is not safe, and spawn behaves the same on every platform. A pool
+    that broke (a worker died) is replaced on the next submit.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._start()
+            try:
+                return self._pool.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                self._pool.shutdown(wait=False)
+                self._pool = self._start()
+                return self._pool.submit(fn, *args, **kwargs)
@@ -0,0 +1,125 @@
+"""SQLite-backed store of reference records.
+
+Records are looked up by "Sr no." (the primary key); Name and City carry
+secondary indexes. Each record is kept as the same dict of field name to
+value that compare_data expects, and whole upload batches are resolved with
+a single query.
+"""
+import csv
+import json
+import os
+
+from sqlite_db import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    sr_no TEXT PRIMARY KEY,
+    name TEXT,
+    city TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_name ON records(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS records_city ON records(city COLLATE NOCASE);
+"""
+
+# SQLite's default limit on host parameters per statement is 999 on older builds
+MAX_QUERY_PARAMETERS = 900
+
+# Demo reference records, keyed by Sr no.; app.py seeds them only when SEED_DEMO_RECORDS=1
+DEMO_RECORDS = {
+    "S001": { "Sr no.": "S001", "Name": "Hemanshu Kasar", "City": "Nagpur", "Age": "23", "Country": "India", "Address": "7, gurudeo nagar" },
+    "S002": { "Sr no.": "S002", "Name": "John Doe", "City": "New York", "Age": "30", "Country": "USA", "Address": "123 Main St" },
+    "S003": { "Sr no.": "S003", "Name": "Sarah Johnson", "City": "London", "Age": "27", "Country": "UK", "Address": "45 Oxford Street" },
+    "S004": { "Sr no.": "S004", "Name": "Raj Patel", "City": "Mumbai", "Age": "32", "Country": "India", "Address": "201, Sea View Apartments" },
+    "S005": { "Sr no.": "S005", "Name": "Maria Garcia", "City": "Barcelona", "Age": "29", "Country": "Spain", "Address": "Carrer de Mallorca, 15" },
+    "S006": { "Sr no.": "S006", "Name": "Akira Tanaka", "City": "Tokyo", "Age": "35", "Country": "Japan", "Address": "2-1-3 Shibuya" },
+    "S007": { "Sr no.": "S007", "Name": "Chen Wei", "City": "Shanghai", "Age": "26", "Country": "China", "Address": "88 Nanjing Road" },
+    "S008": { "Sr no.": "S008", "Name": "Lucas Silva", "City": "São Paulo", "Age": "31", "Country": "Brazil", "Address": "Rua Augusta, 1200" },
+    "S009": { "Sr no.": "S009", "Name": "Olivia Miller", "City": "Sydney", "Age": "28", "Country": "Australia", "Address": "42 Bondi Beach Road" },
+    "S010": { "Sr no.": "S010", "Name": "Ahmed Hassan", "City": "Cairo", "Age": "33", "Country": "Egypt", "Address": "17 Al Tahrir Square" }
+}
+
+
+class RecordStore:
+    """Indexed reference-record table with batched lookups and bulk import."""
+
+    def __init__(self, db_path, key_field="Sr no.", name_field="Name", city_field="City"):
+        self.db_path = db_path
+        self.key_field = key_field
+        self.name_field = name_field
+        self.city_field = city_field
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with connect(self.db_path) as conn:
+            conn.executescript(SCHEMA)
+
+    def count(self):
+        with connect(self.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def get(self, sr_no):
+        """Returns the record for one Sr no., or None."""
+        return self.get_many([sr_no]).get(sr_no)
+
+    def get_many(self, sr_nos):
+        """Returns {sr_no: record} for every Sr no. that exists, in one query per 900 keys."""
+        keys = list(dict.fromkeys(sr_no for sr_no in sr_nos if sr_no))
+        records = {}
+        with connect(self.db_path) as conn:
+            for start in range(0, len(keys), MAX_QUERY_PARAMETERS):
+                chunk = keys[start:start + MAX_QUERY_PARAMETERS]
+                placeholders = ','.join('?' * len(chunk))
+                for sr_no, data in conn.execute(
+                    f"SELECT sr_no, data FROM records WHERE sr_no IN ({placeholders})", chunk
+                ):
+                    records[sr_no] = json.loads(data)
+        return records
+
+    def find_by_name(self, name):
+        """Returns all records whose Name matches (case-insensitive)."""
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT data FROM records WHERE name = ? COLLATE NOCASE", (name,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def find_by_city(self, city):
+        """Returns all records whose City matches (case-insensitive)."""
+        with connect(self.db_path) as conn:
+            rows = conn.execute("SELECT data FROM records WHERE city = ? COLLATE NOCASE", (city,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def upsert_many(self, records, batch_size=5000):
+        """Inserts or replaces records (dicts keyed by field name); returns how many were written.
+
+        Records without a Sr no. are skipped. records may be any iterable, so
+        large imports are streamed in batches rather than held in memory.
+        """
+        written = 0
+        batch = []
+        with connect(self.db_path) as conn:
+            for record in records:
+                sr_no = record.get(self.key_field)
+                if not sr_no:
+                    continue
+                batch.append((sr_no, record.get(self.name_field), record.get(self.city_field), json.dumps(record)))
+                if len(batch) >= batch_size:
+                    written += self._write_batch(conn, batch)
+                    batch = []
+            if batch:
+                written += self._write_batch(conn, batch)
+        return written
+
+    @staticmethod
+    def _write_batch(conn, batch):
+        conn.executemany("INSERT OR REPLACE INTO records (sr_no, name, city, data) VALUES (?, ?, ?, ?)", batch)
+        return len(batch)
+
+    def import_file(self, path):
+        """Bulk-loads records from a CSV (header row of field names) or JSONL file."""
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            if path.lower().endswith(('.jsonl', '.ndjson')):
+                return self.upsert_many(json.loads(line) for line in f if line.strip())
+            return self.upsert_many(
+                {key: (value.strip() if value is not None else None) for key, value in row.items()}
+                for row in csv.DictReader(f)
+            )
@@ -0,0 +1,21 @@
+"""Shared SQLite connection handling for the job queue, extraction cache and record store."""
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(db_path, row_factory=None):
+    """Yields a WAL-mode connection that commits on success and is always closed.
+
+    WAL lets every gunicorn worker read while another one writes; the 30s busy
+    timeout covers the short write transactions of the other workers.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            yield conn
+    finally:
+        conn.close()
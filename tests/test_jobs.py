@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+
+from jobs import JobQueue
+
+
+class Upload:
+    """Minimal stand-in for a Werkzeug FileStorage."""
+
+    def __init__(self, filename, content=b'data'):
+        self.filename = filename
+        self.content = content
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.content)
+
+
+def make_queue(tmp_path, process_file=None, **options):
+    """A queue on the shared test database whose dispatcher is driven by hand."""
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'uploads'),
+                     process_file or (lambda path, filename: {"file": filename}), **options)
+    queue.start = lambda: None
+    return queue
+
+
+def age_heartbeats(queue, seconds):
+    with sqlite3.connect(queue.db_path) as conn:
+        conn.execute("UPDATE job_files SET heartbeat_at = heartbeat_at - ? WHERE status = 'running'", (seconds,))
+
+
+def test_stale_file_is_requeued_and_late_finish_is_discarded(tmp_path):
+    first = make_queue(tmp_path, stale_after=60)
+    second = make_queue(tmp_path, stale_after=60)
+    job_id = first.submit([Upload('a.png')])
+
+    lost = first._claim()
+    age_heartbeats(first, 120) # The first worker stopped heartbeating
+    second._requeue_stale()
+    current = second._claim()
+    assert current is not None and current['token'] != lost['token']
+
+    assert first._finish_file(lost, 'done', {"by": "first"}) is False
+    assert second._finish_file(current, 'done', {"by": "second"}) is True
+
+    status = second.status(job_id)
+    assert status['status'] == 'finished'
+    assert status['files'][0]['result'] == {"by": "second"}
+
+
+def test_heartbeat_keeps_a_long_running_file_claimed(tmp_path):
+    owner = make_queue(tmp_path, stale_after=60)
+    other = make_queue(tmp_path, stale_after=60)
+    owner.submit([Upload('a.png')])
+
+    claimed = owner._claim()
+    age_heartbeats(owner, 120)
+    owner._heartbeat()
+    other._requeue_stale()
+
+    assert other._claim() is None
+    assert owner._finish_file(claimed, 'done', {}) is True
+
+
+def test_dispatcher_survives_database_errors(tmp_path):
+    done = threading.Event()
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'uploads'),
+                     lambda path, filename: done.set() or {"file": filename}, poll_interval=0.05)
+    claim = queue._claim
+    failures = []
+
+    def flaky_claim():
+        if not failures:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        return claim()
+
+    queue._claim = flaky_claim
+    job_id = queue.submit([Upload('a.png')])
+
+    assert done.wait(5)
+    deadline = time.monotonic() + 5
+    while queue.status(job_id)['status'] != 'finished':
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert failures and queue._dispatcher.is_alive()
+
+
+def test_restarting_a_dead_dispatcher_keeps_in_flight_files(tmp_path):
+    release = threading.Event()
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), str(tmp_path / 'uploads'),
+                     lambda path, filename: release.wait(5) and {"file": filename}, poll_interval=0.05)
+    queue.submit([Upload('a.png')])
+
+    deadline = time.monotonic() + 5
+    while not queue._running:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    executor, running = queue._executor, dict(queue._running)
+
+    queue._dispatcher = threading.Thread(target=lambda: None) # A dispatcher that has died
+    queue._dispatcher.start()
+    queue._dispatcher.join()
+    queue.start()
+
+    assert queue._executor is executor
+    assert queue._running == running and queue._in_flight == 1
+    release.set()
+
+
+def test_job_database_without_heartbeat_columns_is_migrated(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, created_at REAL NOT NULL, finished_at REAL);"
+            "CREATE TABLE job_files (job_id TEXT, position INTEGER, filename TEXT, path TEXT,"
+            " status TEXT NOT NULL DEFAULT 'queued', claimed_at REAL, finished_at REAL, result TEXT,"
+            " PRIMARY KEY (job_id, position));"
+        )
+    make_queue(tmp_path)
+    with sqlite3.connect(path) as conn:
+        names = {row[1] for row in conn.execute("PRAGMA table_info(job_files)")}
+    assert {'claim_token', 'heartbeat_at'} <= names
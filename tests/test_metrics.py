@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+
+from metrics import Metrics
+
+
+def series(metrics, name):
+    return [line for line in metrics.render().splitlines() if line.startswith(f"ocr_app_{name}")]
+
+
+def test_concurrent_forced_flushes_do_not_collide(tmp_path):
+    metrics = Metrics(str(tmp_path))
+    errors = []
+
+    def flush_repeatedly():
+        for _ in range(200):
+            try:
+                metrics.inc('x')
+                metrics.flush(force=True)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=flush_repeatedly) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert series(Metrics(str(tmp_path)), 'x') == ['ocr_app_x 800']
+
+
+def test_background_thread_publishes_counts_without_a_flush_call(tmp_path):
+    metrics = Metrics(str(tmp_path), flush_interval=0.1)
+    threading.Thread(target=metrics.inc, args=('x',), kwargs={'amount': 3}).start()
+    time.sleep(0.4)
+    assert series(Metrics(str(tmp_path)), 'x') == ['ocr_app_x 3']
+
+
+def test_counts_of_exited_processes_are_compacted_and_kept(tmp_path):
+    exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                            capture_output=True, text=True).stdout.strip()
+    for token, value in (('a', 2), ('b', 3)): # Two workers that happened to share a PID
+        (tmp_path / f"{exited}-{token}.json").write_text(json.dumps({'counters': [['x', {}, value]], 'histograms': []}))
+
+    metrics = Metrics(str(tmp_path))
+    metrics.inc('x')
+    assert series(metrics, 'x') == ['ocr_app_x 6']
+    assert not list(tmp_path.glob(f"{exited}-*.json"))
+    assert series(metrics, 'x') == ['ocr_app_x 6']
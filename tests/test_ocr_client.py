@@ -0,0 +1,83 @@
+import io
+import socket
+import time
+
+import pytest
+import requests
+
+from ocr_client import OCRSpaceClient, TokenBucket
+from ocr_stub_server import start_server
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server, url = start_server(**options)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(url, **options):
+    options.setdefault('backoff_factor', 0.01)
+    return OCRSpaceClient(url, 'test-key', **options)
+
+
+def test_retries_server_errors_then_succeeds(stub):
+    server, url = stub(fail_first=2, fail_status=503)
+    response = make_client(url, max_retries=3).parse_image(io.BytesIO(b'image'))
+
+    assert response['IsErroredOnProcessing'] is False
+    assert server.request_count == 3
+
+
+def test_honours_retry_after_on_throttling(stub):
+    server, url = stub(fail_first=1, fail_status=429, retry_after=1)
+    started = time.monotonic()
+    make_client(url, max_retries=1).parse_image(io.BytesIO(b'image'))
+
+    assert time.monotonic() - started >= 1
+    assert server.request_count == 2
+
+
+def test_gives_up_after_max_retries(stub):
+    server, url = stub(fail_first=10, fail_status=502)
+    with pytest.raises(requests.exceptions.HTTPError):
+        make_client(url, max_retries=2).parse_image(io.BytesIO(b'image'))
+    assert server.request_count == 3
+
+
+def test_read_timeout_is_not_retried(stub):
+    # The API may already have processed (and billed) a request whose response timed out
+    server, url = stub(latency=1.0)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        make_client(url, read_timeout=0.2, max_retries=3).parse_image(io.BytesIO(b'image'))
+    assert server.request_count == 1
+
+
+def test_refused_connection_is_retried():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1] # Nothing listens here once the probe is closed
+    client = make_client(f"http://127.0.0.1:{port}/parse/image", max_retries=2)
+    attempts = []
+    post = client.session.post
+    client.session.post = lambda *args, **kwargs: attempts.append(1) or post(*args, **kwargs)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.parse_image(io.BytesIO(b'image'))
+    assert len(attempts) == 3
+
+
+def test_token_bucket_paces_calls():
+    bucket = TokenBucket(rate=10, capacity=1)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.25
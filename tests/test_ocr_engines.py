@@ -0,0 +1,32 @@
+import io
+
+import pytest
+from PIL import Image
+
+from ocr_engines import TesseractEngine
+
+
+@pytest.mark.parametrize('changed', [
+    {'language': 'deu'},
+    {'target_dpi': 200},
+    {'max_dimension': 2000},
+    {'threshold': 128},
+    {'config': '--psm 6'},
+])
+def test_engine_name_changes_with_every_output_setting(changed):
+    # The name is part of the extraction cache key
+    assert TesseractEngine(process_workers=0, **changed).name != TesseractEngine(process_workers=0).name
+
+
+@pytest.mark.skipif(TesseractEngine.available(), reason="needs a machine without the tesseract binary")
+def test_pool_errors_are_reported_without_breaking_the_pool():
+    # pytesseract's TesseractNotFoundError cannot be unpickled, which used to break the process pool
+    engine = TesseractEngine(process_workers=1)
+    image = io.BytesIO()
+    Image.new('L', (20, 20), 255).save(image, 'PNG')
+
+    for _ in range(2):
+        image.seek(0)
+        text = engine.recognize(image, 'blank.png')
+        assert text.startswith("Error during local OCR processing")
+        assert 'terminated' not in text